@@ -1,392 +1,716 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
 import numpy as np
-from PIL import Image
 import io
 import os
-import tensorflow as tf
+import json
+import tarfile
+import threading
+import time
+import traceback
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
-# Suppress TensorFlow logging
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
-tf.get_logger().setLevel('ERROR')
+import metrics
+import preprocessing
+from batching import BatcherOverloaded
+from model_registry import ModelRegistry, ModelSpec, UnknownModel
+from inference_backends import get_backend
+from preprocessing import ImageTooLarge
+from prediction_cache import PredictionCache, digest_key, tensor_key, model_fingerprint
+from timing import NULL_TIMER, StageTimer
+from uploads import (
+    MAX_BATCH_FIELDS, MAX_BATCH_FILES, MAX_BATCH_UPLOAD_BYTES, MAX_UPLOAD_BYTES, UnsupportedImage, Upload,
+    UploadTooLarge, check_image, spool_member
+)
+from disease_catalog import MODEL_CLASSES, DISEASE_DATABASE, get_related_conditions
+from catalog_routes import catalog
+from job_routes import jobs
+
+# Suppress TensorFlow logging (TensorFlow itself is only imported when the
+# Keras backend loads a model)
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
 
 app = Flask(__name__)
 CORS(app)
+# Larger requests get 413 before their body is read
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+app.register_blueprint(catalog)
+app.register_blueprint(jobs)
 
-# ============================================================================
-# COMPREHENSIVE SKIN DISEASE DATABASE
-# ============================================================================
-# The model recognizes 8 core diseases, but we provide information on many more
-# The predictions will suggest related conditions when appropriate
-
-# Core model classes (8 classes trained model can recognize)
-MODEL_CLASSES = [
-    "Cellulitis",
-    "Impetigo", 
-    "Athlete's Foot",
+# DermNet classes (alphabetical folder order used by flow_from_directory in
+# the training notebook), predicted by the 23-class DermNet models
+DERMNET_CLASSES = [
+    "Acne and Rosacea",
+    "Actinic Keratosis & Skin Cancer",
+    "Atopic Dermatitis",
+    "Bullous Disease",
+    "Cellulitis & Bacterial Infections",
+    "Eczema",
+    "Drug Eruptions",
+    "Hair Loss & Alopecia",
+    "Herpes & STDs",
+    "Pigmentation Disorders",
+    "Lupus & Connective Tissue",
+    "Melanoma & Moles",
     "Nail Fungus",
-    "Ringworm",
-    "Cutaneous Larva Migrans",
-    "Chickenpox",
-    "Shingles"
+    "Contact Dermatitis",
+    "Psoriasis & Lichen Planus",
+    "Scabies & Infestations",
+    "Seborrheic Keratoses",
+    "Systemic Disease",
+    "Fungal Infections",
+    "Urticaria Hives",
+    "Vascular Tumors",
+    "Vasculitis",
+    "Warts & Viral Infections"
 ]
 
-# Extended disease database for comprehensive information
-DISEASE_DATABASE = {
-    # ========== CORE MODEL DISEASES (Can be detected) ==========
-    "Cellulitis": {
-        "category": "Bacterial Infections",
-        "description": "A serious bacterial skin infection causing redness, swelling, warmth, and pain. Usually affects the lower legs but can occur anywhere. If untreated, it can spread to lymph nodes and bloodstream.",
-        "symptoms": ["Red, swollen skin", "Pain and tenderness", "Warmth in affected area", "Fever and chills", "Skin dimpling"],
-        "causes": ["Bacteria entering through cuts", "Strep or staph bacteria", "Insect bites", "Surgical wounds"],
-        "recommendation": "⚠️ Seek medical attention promptly. Antibiotics are typically required. Keep the affected area elevated and apply cool compresses.",
-        "severity": "moderate-high",
-        "contagious": False,
-        "detectable": True
-    },
-    "Impetigo": {
-        "category": "Bacterial Infections",
-        "description": "A highly contagious bacterial skin infection most common in children. Causes red sores that rupture, ooze, and form a characteristic honey-colored crust.",
-        "symptoms": ["Red sores around nose/mouth", "Honey-colored crusts", "Itching", "Blisters", "Swollen lymph nodes"],
-        "causes": ["Staphylococcus bacteria", "Streptococcus bacteria", "Contact with infected person", "Poor hygiene"],
-        "recommendation": "Consult a doctor for antibiotic treatment (cream or oral). Keep sores clean and covered. Avoid touching and wash hands frequently.",
-        "severity": "mild-moderate",
-        "contagious": True,
-        "detectable": True
-    },
-    "Athlete's Foot": {
-        "category": "Fungal Infections",
-        "description": "A contagious fungal infection (tinea pedis) that typically begins between the toes. Causes scaly, itchy, and sometimes painful rash. Common in people whose feet become sweaty while confined in tight shoes.",
-        "symptoms": ["Scaly, peeling skin", "Itching and burning", "Blisters", "Dry skin on soles", "Raw skin between toes"],
-        "causes": ["Trichophyton fungus", "Warm, moist environments", "Shared showers/pools", "Tight footwear"],
-        "recommendation": "Use over-the-counter antifungal creams, sprays, or powders. Keep feet dry and clean. Wear breathable footwear and change socks regularly.",
-        "severity": "mild",
-        "contagious": True,
-        "detectable": True
-    },
-    "Nail Fungus": {
-        "category": "Fungal Infections",
-        "description": "A fungal infection (onychomycosis) affecting fingernails or toenails. Causes thickening, discoloration (yellow/brown), and crumbling at the edge of the nail. Can be difficult to treat.",
-        "symptoms": ["Thickened nails", "Yellow/brown discoloration", "Brittle, crumbly nails", "Distorted nail shape", "Foul odor"],
-        "causes": ["Dermatophyte fungi", "Warm, moist conditions", "Damaged nails", "Poor circulation"],
-        "recommendation": "See a dermatologist for prescription oral antifungal medication. Treatment takes 6-12 months. Keep nails trimmed short and dry.",
-        "severity": "mild-moderate",
-        "contagious": True,
-        "detectable": True
-    },
-    "Ringworm": {
-        "category": "Fungal Infections",
-        "description": "A contagious fungal infection (tinea corporis) causing a ring-shaped, red, itchy patch on the skin with clearer skin in the center. Despite the name, no worm is involved.",
-        "symptoms": ["Ring-shaped rash", "Red, scaly border", "Itching", "Clear center", "Multiple rings"],
-        "causes": ["Dermatophyte fungi", "Contact with infected person/animal", "Contaminated objects", "Warm, humid conditions"],
-        "recommendation": "Apply antifungal creams (clotrimazole, miconazole) for 2-4 weeks. Keep the area clean and dry. Avoid sharing personal items.",
-        "severity": "mild",
-        "contagious": True,
-        "detectable": True
-    },
-    "Cutaneous Larva Migrans": {
-        "category": "Parasitic Infections",
-        "description": "A parasitic skin infection caused by hookworm larvae penetrating the skin. Creates distinctive winding, snake-like tracks that are intensely itchy. Often acquired from walking barefoot on contaminated sand/soil.",
-        "symptoms": ["Winding red tracks", "Intense itching", "Raised, snake-like lines", "Blisters along tracks"],
-        "causes": ["Hookworm larvae", "Contaminated sand/soil", "Animal feces (dogs/cats)", "Walking barefoot"],
-        "recommendation": "Consult a doctor for antiparasitic medication (ivermectin or albendazole). Avoid scratching to prevent secondary infection. Wear footwear on beaches.",
-        "severity": "moderate",
-        "contagious": False,
-        "detectable": True
-    },
-    "Chickenpox": {
-        "category": "Viral Infections",
-        "description": "A highly contagious viral infection (varicella) causing an itchy, blister-like rash covering the body. Usually mild in children but can be severe in adults and immunocompromised individuals.",
-        "symptoms": ["Itchy blisters", "Fever", "Fatigue", "Loss of appetite", "Headache", "Rash progressing from spots to blisters to crusts"],
-        "causes": ["Varicella-zoster virus", "Airborne transmission", "Direct contact with blisters"],
-        "recommendation": "Rest and stay hydrated. Use calamine lotion and oatmeal baths for itching. Take antihistamines as needed. Consult doctor for antivirals if high-risk.",
-        "severity": "moderate",
-        "contagious": True,
-        "detectable": True
-    },
-    "Shingles": {
-        "category": "Viral Infections",
-        "description": "A painful viral infection (herpes zoster) causing a blistering rash, typically appearing as a stripe on one side of the body. Caused by reactivation of the dormant chickenpox virus, often triggered by stress or weakened immunity.",
-        "symptoms": ["Burning pain", "Tingling/numbness", "Stripe of blisters", "Sensitivity to touch", "Fever", "Fatigue"],
-        "causes": ["Reactivation of varicella-zoster virus", "Weakened immune system", "Aging", "Stress"],
-        "recommendation": "⚠️ Seek medical attention within 72 hours for antiviral medication. Pain management is important. Keep rash clean and covered. Vaccine available for prevention.",
-        "severity": "moderate-high",
-        "contagious": True,
-        "detectable": True
-    },
-    
-    # ========== ADDITIONAL DISEASES (Information provided, related to detected conditions) ==========
-    "Acne": {
-        "category": "Inflammatory Conditions",
-        "description": "A common skin condition where hair follicles become clogged with oil and dead skin cells. Causes pimples, blackheads, whiteheads, and cysts, primarily on the face, chest, and back.",
-        "symptoms": ["Pimples", "Blackheads", "Whiteheads", "Cysts", "Oily skin", "Scarring"],
-        "causes": ["Excess oil production", "Clogged hair follicles", "Bacteria", "Hormonal changes"],
-        "recommendation": "Use gentle cleansers and non-comedogenic products. Try OTC benzoyl peroxide or salicylic acid. See a dermatologist for severe cases.",
-        "severity": "mild-moderate",
-        "contagious": False,
-        "detectable": False,
-        "related_to": ["Impetigo"]
-    },
-    "Eczema": {
-        "category": "Inflammatory Conditions",
-        "description": "A chronic condition (atopic dermatitis) causing dry, itchy, inflamed skin patches. Often appears in childhood and may be associated with allergies and asthma. Symptoms come and go in flares.",
-        "symptoms": ["Dry, scaly skin", "Intense itching", "Red patches", "Thickened skin", "Small raised bumps"],
-        "causes": ["Genetic factors", "Immune dysfunction", "Environmental triggers", "Skin barrier defects"],
-        "recommendation": "Moisturize frequently with fragrance-free products. Identify and avoid triggers. Use topical corticosteroids during flares. See a dermatologist for persistent cases.",
-        "severity": "mild-moderate",
-        "contagious": False,
-        "detectable": False,
-        "related_to": ["Ringworm", "Impetigo"]
-    },
-    "Psoriasis": {
-        "category": "Autoimmune Conditions",
-        "description": "An autoimmune condition that causes rapid skin cell buildup, resulting in thick, red patches with silvery scales. Commonly affects elbows, knees, scalp, and lower back.",
-        "symptoms": ["Red patches with silvery scales", "Dry, cracked skin", "Itching and burning", "Thickened nails", "Stiff joints"],
-        "causes": ["Overactive immune system", "Genetic predisposition", "Triggers (stress, infections, weather)"],
-        "recommendation": "Moisturize regularly. Use medicated creams (corticosteroids, vitamin D). Phototherapy may help. Consult a dermatologist for biologics if severe.",
-        "severity": "moderate",
-        "contagious": False,
-        "detectable": False,
-        "related_to": ["Ringworm", "Eczema"]
-    },
-    "Hives (Urticaria)": {
-        "category": "Allergic Reactions",
-        "description": "Red, itchy, raised welts (wheals) that appear suddenly, often as an allergic reaction. Individual hives typically last less than 24 hours, but new ones can appear.",
-        "symptoms": ["Raised welts", "Intense itching", "Swelling", "Welts that change shape", "Worse with heat"],
-        "causes": ["Allergic reactions", "Foods", "Medications", "Insect stings", "Stress", "Infections"],
-        "recommendation": "Take antihistamines (Benadryl, Zyrtec). Avoid known triggers. Apply cool compresses. Seek emergency care if throat swelling or breathing difficulty.",
-        "severity": "mild-moderate",
-        "contagious": False,
-        "detectable": False,
-        "related_to": ["Chickenpox", "Shingles"]
-    },
-    "Contact Dermatitis": {
-        "category": "Inflammatory Conditions",
-        "description": "Skin inflammation caused by direct contact with irritants (soaps, chemicals) or allergens (nickel, latex, poison ivy). Results in a red, itchy rash in the contact area.",
-        "symptoms": ["Red rash", "Itching", "Blisters", "Dry, cracked skin", "Swelling", "Burning"],
-        "causes": ["Irritants (soaps, solvents)", "Allergens (nickel, latex)", "Plants (poison ivy)", "Fragrances"],
-        "recommendation": "Identify and avoid the trigger. Wash the area thoroughly. Apply corticosteroid cream. Use cool compresses. See a doctor if severe.",
-        "severity": "mild-moderate",
-        "contagious": False,
-        "detectable": False,
-        "related_to": ["Eczema", "Ringworm"]
-    },
-    "Rosacea": {
-        "category": "Inflammatory Conditions",
-        "description": "A chronic skin condition causing facial redness, visible blood vessels, and sometimes small pus-filled bumps. Often mistaken for acne or allergic reaction. More common in fair-skinned adults.",
-        "symptoms": ["Facial redness", "Visible blood vessels", "Small red bumps", "Eye irritation", "Thickened skin on nose"],
-        "causes": ["Unknown (may involve blood vessels, immune system)", "Triggers (sun, stress, alcohol, spicy food)"],
-        "recommendation": "Avoid triggers. Use gentle, fragrance-free skincare. Protect skin from sun. See a dermatologist for prescription treatments (metronidazole, azelaic acid).",
-        "severity": "mild-moderate",
-        "contagious": False,
-        "detectable": False,
-        "related_to": ["Impetigo", "Cellulitis"]
-    },
-    "Warts": {
-        "category": "Viral Infections",
-        "description": "Small, rough growths caused by human papillomavirus (HPV) infection. Very common in children. Can appear anywhere but often on hands and feet. Usually harmless but contagious.",
-        "symptoms": ["Rough, grainy bumps", "Flesh-colored or gray", "Black dots (clotted blood vessels)", "Clusters of growths"],
-        "causes": ["Human papillomavirus (HPV)", "Direct contact", "Shared surfaces", "Scratching/shaving"],
-        "recommendation": "Many warts disappear on their own. Try OTC salicylic acid treatments. See a doctor for freezing (cryotherapy) or other removal methods if persistent.",
-        "severity": "mild",
-        "contagious": True,
-        "detectable": False,
-        "related_to": ["Chickenpox"]
-    },
-    "Skin Cancer": {
-        "category": "Cancer",
-        "description": "Abnormal growth of skin cells, most commonly on sun-exposed areas. Three main types: basal cell carcinoma (most common), squamous cell carcinoma, and melanoma (most dangerous). Early detection is crucial.",
-        "symptoms": ["New or changing moles", "Asymmetric lesions", "Irregular borders", "Multiple colors", "Growing or evolving spots", "Non-healing sores"],
-        "causes": ["UV radiation (sun/tanning beds)", "Fair skin", "History of sunburns", "Many moles", "Family history"],
-        "recommendation": "⚠️ See a dermatologist immediately for any suspicious skin changes. Use ABCDE rule for moles. Protect skin from sun. Get regular skin checks.",
-        "severity": "high",
-        "contagious": False,
-        "detectable": False,
-        "related_to": ["Cellulitis"]
-    },
-    "Jock Itch": {
-        "category": "Fungal Infections",
-        "description": "A fungal infection (tinea cruris) affecting the groin, inner thighs, and buttocks. Causes an itchy, red, ring-shaped rash. More common in athletes and people who sweat heavily.",
-        "symptoms": ["Ring-shaped red rash", "Itching and burning", "Flaking, peeling skin", "Redness in groin folds"],
-        "causes": ["Same fungi as athlete's foot", "Warm, moist conditions", "Tight clothing", "Sweating"],
-        "recommendation": "Keep area clean and dry. Apply antifungal cream (clotrimazole, terbinafine). Wear loose, cotton underwear. Treat athlete's foot to prevent spread.",
-        "severity": "mild",
-        "contagious": True,
-        "detectable": False,
-        "related_to": ["Athlete's Foot", "Ringworm"]
-    },
-    "Scabies": {
-        "category": "Parasitic Infections",
-        "description": "An intensely itchy skin condition caused by tiny burrowing mites. Spreads through close personal contact. Causes a pimple-like rash and intense itching, especially at night.",
-        "symptoms": ["Intense itching (worse at night)", "Pimple-like rash", "Tiny burrow tracks", "Sores from scratching"],
-        "causes": ["Sarcoptes scabiei mite", "Close personal contact", "Shared bedding/clothing"],
-        "recommendation": "⚠️ See a doctor for prescription cream (permethrin). All household members should be treated. Wash all bedding and clothing in hot water.",
-        "severity": "moderate",
-        "contagious": True,
-        "detectable": False,
-        "related_to": ["Cutaneous Larva Migrans"]
+IMAGE_SIZE = (150, 150)
+
+# Models shipped in backend/models. Input sizes not given here are read from
+# the model file when it is loaded.
+MODEL_SPECS = [
+    ModelSpec('skin_disease_model', 'skin_disease_model.h5', MODEL_CLASSES,
+              input_size=IMAGE_SIZE, scaling='unit',
+              description='Lightweight CNN, 8 core classes',
+              path=os.environ.get('MODEL_PATH') or None),
+    ModelSpec('dermnet_model', 'dermnet_model.h5', DERMNET_CLASSES,
+              scaling='caffe', description='ResNet50 transfer model, 23 DermNet classes'),
+    ModelSpec('efficientnetv2s', 'efficientnetv2s.h5', DERMNET_CLASSES,
+              input_size=(299, 299), scaling='raw',
+              description='EfficientNetV2-S transfer model, 23 DermNet classes')
+]
+DEFAULT_MODEL = os.environ.get('DEFAULT_MODEL', 'skin_disease_model')
+MODEL_DIR = os.environ.get('MODEL_DIR') or os.path.join(os.path.dirname(__file__), 'models')
+
+# Micro-batching: concurrent /api/predict requests are grouped into one
+# model call of up to BATCH_MAX_SIZE images, waiting at most BATCH_MAX_WAIT_MS
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 32))
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', 10))
+BATCH_MAX_QUEUE = int(os.environ.get('BATCH_MAX_QUEUE', 1024))
+
+def _env_list(name, default):
+    return [item.strip() for item in os.environ.get(name, default).split(',') if item.strip()]
+
+# Inference backend: 'keras' serves the .h5 files, 'tflite' serves the
+# artifacts written by export_model.py with INFERENCE_THREADS threads each
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras')
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', 0)) or None
+
+# Models are loaded lazily per process. "ensemble" averages models sharing a
+# class list; "cascade" escalates to the next model when top-1 confidence is
+# below CASCADE_THRESHOLD.
+registry = ModelRegistry(
+    MODEL_SPECS,
+    model_dir=MODEL_DIR,
+    backend=get_backend(INFERENCE_BACKEND, num_threads=INFERENCE_THREADS),
+    default=DEFAULT_MODEL,
+    ensemble=_env_list('ENSEMBLE_MODELS', 'dermnet_model,efficientnetv2s'),
+    cascade=_env_list('CASCADE_MODELS', 'skin_disease_model,efficientnetv2s'),
+    cascade_threshold=float(os.environ.get('CASCADE_THRESHOLD', 0.6)),
+    batch_options={
+        'max_batch_size': BATCH_MAX_SIZE,
+        'max_wait_ms': BATCH_MAX_WAIT_MS,
+        'max_queue_size': BATCH_MAX_QUEUE
     }
+)
+# Extra models to load and warm up at startup besides DEFAULT_MODEL
+PRELOAD_MODELS = _env_list('PRELOAD_MODELS', '')
+# After a failed load, requests get 503 for this long before loading is retried
+MODEL_RETRY_SECONDS = float(os.environ.get('MODEL_RETRY_SECONDS', 30))
+
+# Batch endpoint: images are decoded on PREPROCESS_WORKERS threads and run
+# through the model PREDICT_BATCH_SIZE at a time
+PREDICT_BATCH_SIZE = int(os.environ.get('PREDICT_BATCH_SIZE', BATCH_MAX_SIZE))
+PREPROCESS_WORKERS = int(os.environ.get('PREPROCESS_WORKERS', min(4, os.cpu_count() or 1)))
+
+# Tiled inference (tiles=N): the full view plus an N x N grid of crops
+# overlapping by TILE_OVERLAP, run through the model as one batch and merged
+# by TILE_MERGE ('max' keeps small lesions that only fill one crop visible)
+TILE_GRID = int(os.environ.get('TILE_GRID', 3))
+TILE_MAX_GRID = int(os.environ.get('TILE_MAX_GRID', 4))
+TILE_OVERLAP = float(os.environ.get('TILE_OVERLAP', 0.25))
+TILE_MERGE = os.environ.get('TILE_MERGE', 'max')
+TILE_MERGES = ('max', 'mean')
+
+# Prediction cache keyed by upload/tensor hash (PREDICTION_CACHE_ENTRIES=0
+# disables it); PREDICTION_CACHE_DIR adds a SQLite store shared by workers
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('PREDICTION_CACHE_ENTRIES', 4096)),
+    max_bytes=int(float(os.environ.get('PREDICTION_CACHE_MB', 16)) * 1024 * 1024),
+    disk_dir=os.environ.get('PREDICTION_CACHE_DIR') or None,
+    max_disk_entries=int(os.environ.get('PREDICTION_CACHE_DISK_ENTRIES', 100000))
+)
+
+def load_model(name=None):
+    """Load a pre-trained model from the registry (the default model if no name)"""
+    name = name or registry.default
+    already_loaded = registry.is_loaded(name)
+    loaded = registry.get(name)
+    
+    if not already_loaded:
+        prediction_cache.set_model(model_fingerprint(*registry.fingerprint_paths()))
+        print(f"✅ Model '{name}' loaded from {loaded.path}")
+        print(f"   Input size: {loaded.input_size[0]}x{loaded.input_size[1]}")
+        print(f"   Classes: {len(loaded.classes)}")
+    
+    return loaded
+
+# Model lifecycle for this process, reported on /api/health
+model_state = {
+    'status': 'not_loaded',
+    'error': None,
+    'pid': None,
+    'load_seconds': None,
+    'warmup_seconds': None,
+    'failed_at': None
 }
+_model_lock = threading.Lock()
 
-# Global model variable
-model = None
-IMAGE_SIZE = (150, 150)
+def warm_up_model(loaded):
+    """Run dummy batches of every served batch size so the first real
+    requests don't pay for graph tracing"""
+    loaded.warm_up([1, BATCH_MAX_SIZE, PREDICT_BATCH_SIZE])
+
+def _load_failed_recently():
+    return (model_state['status'] == 'failed' and model_state['pid'] == os.getpid()
+            and time.time() - model_state['failed_at'] < MODEL_RETRY_SECONDS)
 
-def load_model():
-    """Load the pre-trained skin disease model"""
-    global model
+def init_model(retry_cooldown=False):
+    """Load and warm up the default (and PRELOAD_MODELS) once per process.
     
-    model_path = os.path.join(os.path.dirname(__file__), 'models', 'skin_disease_model.h5')
+    TensorFlow's runtime does not survive fork(), so under gunicorn this runs
+    in each worker (post_worker_init in gunicorn.conf.py) rather than in the
+    preloading master. Returns True when the model is ready to serve. With
+    ``retry_cooldown``, a load that failed less than MODEL_RETRY_SECONDS ago
+    is not retried.
+    """
+    with _model_lock:
+        if model_state['status'] == 'ready' and model_state['pid'] == os.getpid():
+            return True
+        # Requests that queued behind a failing load don't each retry it
+        if retry_cooldown and _load_failed_recently():
+            return False
+        model_state.update(status='loading', error=None, pid=os.getpid(), failed_at=None)
+        try:
+            started = time.perf_counter()
+            names = [registry.default] + [n for n in PRELOAD_MODELS if n != registry.default]
+            for name in names:
+                load_model(name)
+            loaded = time.perf_counter()
+            for name in names:
+                warm_up_model(registry.get(name))
+            model_state.update(
+                status='ready',
+                load_seconds=round(loaded - started, 3),
+                warmup_seconds=round(time.perf_counter() - loaded, 3)
+            )
+            print(f"🔥 Model ready in pid {os.getpid()} "
+                  f"(load {model_state['load_seconds']}s, warm-up {model_state['warmup_seconds']}s)")
+        except Exception as e:
+            model_state.update(status='failed', error=str(e), failed_at=time.time())
+            print(f"❌ Model failed to load: {e}")
+        return model_state['status'] == 'ready'
+
+def ensure_model():
+    """Make sure the model is loaded in this process, loading it on first use.
     
-    if os.path.exists(model_path):
-        print(f"Loading pre-trained model from {model_path}...")
-        model = tf.keras.models.load_model(model_path, compile=False)
-        print(f"✅ Model loaded successfully!")
-        print(f"   Input shape: {model.input_shape}")
-        print(f"   Detectable diseases: {len(MODEL_CLASSES)}")
-        print(f"   Total disease database: {len(DISEASE_DATABASE)}")
-    else:
-        raise FileNotFoundError(f"Model not found at {model_path}. Please download the model first.")
+    After a failed load this returns False without retrying until
+    MODEL_RETRY_SECONDS have passed, so requests get a quick 503 instead of
+    queueing behind repeated multi-second load attempts.
+    """
+    if model_state['status'] == 'ready' and model_state['pid'] == os.getpid():
+        return True
+    if _load_failed_recently():
+        return False
+    return init_model(retry_cooldown=True)
+
+def preprocess_image(source, size=IMAGE_SIZE):
+    """Preprocess image (bytes or file-like) for prediction; non-images raise UnsupportedImage"""
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    check_image(stream)
+    return preprocessing.preprocess_image(stream, size)
+
+def predict_cached(loaded, upload, image, timer=NULL_TIMER):
+    """Probabilities of one model for an upload, from the prediction cache when possible"""
+    raw_key = digest_key(upload.digest, loaded.name)
+    probabilities = prediction_cache.get(raw_key)
+    
+    if probabilities is None:
+        img_array = image.array(loaded.input_size)
+        
+        # Identical pixels under different bytes (edited metadata, lossless re-encode) also hit
+        pixels_key = tensor_key(img_array, loaded.name)
+        probabilities = prediction_cache.get(pixels_key)
+        if probabilities is None:
+            prediction_cache.record_miss()
+            # Make prediction (batched with other concurrent requests)
+            with timer.stage('inference'):
+                probabilities = loaded.predict(img_array[0])
+            prediction_cache.put(pixels_key, probabilities)
+        prediction_cache.put(raw_key, probabilities)
     
-    return model
-
-def get_related_conditions(predicted_class):
-    """Get related conditions that might be similar to the prediction"""
-    related = []
-    for name, info in DISEASE_DATABASE.items():
-        if not info.get("detectable", False):
-            related_to = info.get("related_to", [])
-            if predicted_class in related_to:
-                related.append({
-                    "name": name,
-                    "category": info["category"],
-                    "description": info["description"][:150] + "..."
-                })
-    return related[:3]  # Return top 3 related conditions
-
-def preprocess_image(image_bytes):
-    """Preprocess image for prediction"""
-    img = Image.open(io.BytesIO(image_bytes))
-    img = img.convert('RGB')
-    img = img.resize(IMAGE_SIZE)
-    img_array = np.array(img)
-    img_array = np.expand_dims(img_array, axis=0)
-    img_array = img_array / 255.0  # Normalize to [0,1]
-    return img_array
+    return probabilities
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'model_loaded': model is not None,
+class InvalidTiling(ValueError):
+    """Raised for tiles/overlap/merge request parameters out of range"""
+
+def parse_tiling(get):
+    """(grid, overlap, merge) requested with tiles=N|true, overlap= and merge=, or None.
+    
+    ``get`` looks up a request parameter by name.
+    """
+    tiles = (get('tiles') or '').lower()
+    if tiles in ('', '0', 'false', 'no', 'off'):
+        return None
+    try:
+        grid = TILE_GRID if tiles in ('true', 'yes', 'on') else int(tiles)
+        overlap = float(get('overlap') or TILE_OVERLAP)
+    except ValueError:
+        raise InvalidTiling("tiles must be a grid size or 'true', overlap a number")
+    merge = (get('merge') or TILE_MERGE).lower()
+    if not 2 <= grid <= TILE_MAX_GRID:
+        raise InvalidTiling(f"tiles must be between 2 and {TILE_MAX_GRID}")
+    if not 0 <= overlap < 1:
+        raise InvalidTiling("overlap must be at least 0 and less than 1")
+    if merge not in TILE_MERGES:
+        raise InvalidTiling(f"merge must be one of: {', '.join(TILE_MERGES)}")
+    return grid, overlap, merge
+
+def upload_sizes(members, tiling=None):
+    """Sizes an upload is decoded for: each model's input, or crop resolution when tiling"""
+    sizes = [registry.get(name).input_size for name in members]
+    if tiling:
+        grid, overlap, _ = tiling
+        sizes += [preprocessing.tiled_decode_size(size, grid, overlap) for size in sizes]
+    return sizes
+
+def tiles_key(upload, loaded, tiling):
+    grid, overlap, _ = tiling
+    return digest_key(upload.digest, f'{loaded.name}@tiles{grid}x{overlap:g}')
+
+def tile_details(views, probabilities, classes, tiling):
+    """Per-crop scores and a grid x grid heatmap of the merged top-1 class"""
+    grid, overlap, merge = tiling
+    top = int(np.argmax(probabilities))
+    crops = []
+    for i, (box, scores) in enumerate(zip(preprocessing.tile_boxes(grid, overlap), views[1:])):
+        best = int(np.argmax(scores))
+        crops.append({
+            'row': i // grid,
+            'col': i % grid,
+            'box': [round(v, 4) for v in box],
+            'class': classes[best],
+            'confidence': float(scores[best]),
+            'score': float(scores[top])
+        })
+    full_best = int(np.argmax(views[0]))
+    return {
+        'grid': grid,
+        'overlap': overlap,
+        'merge': merge,
+        'full_view': {
+            'class': classes[full_best],
+            'confidence': float(views[0][full_best]),
+            'score': float(views[0][top])
+        },
+        'heatmap': views[1:, top].astype(float).reshape(grid, grid).round(4).tolist(),
+        'crops': crops
+    }
+
+def predict_tiled(loaded, upload, image, tiling, timer=NULL_TIMER):
+    """Merged probabilities and crop details from one batched pass over the full view and its crops"""
+    grid, overlap, merge = tiling
+    key = tiles_key(upload, loaded, tiling)
+    views = prediction_cache.get(key)
+    
+    if views is None:
+        batch = image.tiles(loaded.input_size, grid, overlap)
+        prediction_cache.record_miss()
+        # Bypasses the micro-batcher: the crops already make a full batch
+        with timer.stage('inference'):
+            views = loaded.predict_batch(batch)
+        prediction_cache.put(key, views)
+    
+    # The shared disk cache stores flat vectors
+    views = np.asarray(views).reshape(-1, len(loaded.classes))
+    probabilities = views.max(axis=0) if merge == 'max' else views.mean(axis=0)
+    return probabilities, tile_details(views, probabilities, loaded.classes, tiling)
+
+def run_prediction(selection, upload, image, tiling=None, timer=NULL_TIMER):
+    """``(probabilities, classes, model details, tile details or None)`` for one upload"""
+    if tiling:
+        loaded = registry.get(selection)
+        probabilities, tiles = predict_tiled(loaded, upload, image, tiling, timer)
+        return probabilities, loaded.classes, {'name': loaded.name}, tiles
+    probabilities, classes, model_info = registry.predict(
+        selection, lambda loaded: predict_cached(loaded, upload, image, timer)
+    )
+    return probabilities, classes, model_info, None
+
+def build_prediction_result(probabilities, classes=MODEL_CLASSES):
+    """Build the prediction response body from one row of model output"""
+    pred_index = np.argmax(probabilities)
+    confidence = float(probabilities[pred_index])
+    predicted_class = classes[pred_index]
+    
+    # Get disease info from database
+    disease_info = DISEASE_DATABASE.get(predicted_class, {})
+    
+    # Get related conditions
+    related_conditions = get_related_conditions(predicted_class)
+    
+    # Get top 3 predictions
+    top_indices = np.argsort(probabilities)[-3:][::-1]
+    top_predictions = [
+        {
+            'class': classes[i],
+            'confidence': float(probabilities[i]),
+            'category': DISEASE_DATABASE.get(classes[i], {}).get('category', 'Unknown')
+        }
+        for i in top_indices
+    ]
+    
+    return {
+        'prediction': {
+            'class': predicted_class,
+            'confidence': confidence,
+            'category': disease_info.get('category', 'Unknown'),
+            'description': disease_info.get('description', ''),
+            'symptoms': disease_info.get('symptoms', []),
+            'causes': disease_info.get('causes', []),
+            'recommendation': disease_info.get('recommendation', 'Please consult a healthcare professional.'),
+            'severity': disease_info.get('severity', 'unknown'),
+            'contagious': disease_info.get('contagious', False)
+        },
+        'top_predictions': top_predictions,
+        'related_conditions': related_conditions
+    }
+
+def decode_upload(upload, selection, timer=NULL_TIMER, tiling=None):
+    """Decode an upload up front for each model the selection always runs that will need its pixels.
+    
+    A cascade is decoded for its first stage only; an escalated stage builds
+    its input when it runs, so confident requests never load or feed it.
+    """
+    members = registry.upfront_members(selection)
+    image = preprocessing.DecodedImage(upload.stream, upload_sizes(members, tiling), timer)
+    if tiling:
+        loaded = registry.get(members[0])
+        if not prediction_cache.contains(tiles_key(upload, loaded, tiling)):
+            image.tiles(loaded.input_size, tiling[0], tiling[1])
+        return image
+    for name in members:
+        if not prediction_cache.contains(digest_key(upload.digest, name)):
+            image.array(registry.get(name).input_size)
+    return image
+
+def record_prediction_metrics(upload, image, timer, result, model_info):
+    """Feed one successful /api/predict request into the /metrics series"""
+    metrics.observe_stages(timer)
+    metrics.observe_upload(upload.size, image)
+    metrics.observe_prediction(model_info['name'], result['prediction']['class'])
+    metrics.update_memory(registry)
+
+def request_param(name):
+    """A form field, falling back to the query string"""
+    return request.form.get(name) or request.args.get(name)
+
+def health_status():
+    """Health report and HTTP status (503 until the model is loaded and warmed up)"""
+    ready = model_state['status'] == 'ready'
+    return {
+        'status': 'healthy' if ready else model_state['status'],
+        'model_loaded': registry.is_loaded(registry.default),
+        'model': model_state,
         'detectable_diseases': len(MODEL_CLASSES),
         'total_diseases_in_database': len(DISEASE_DATABASE),
-        'model_type': 'Pre-trained CNN'
-    })
+        'model_type': 'Pre-trained CNN',
+        'models': registry.stats(),
+        'prediction_cache': prediction_cache.stats()
+    }, 200 if ready else 503
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    """Health check endpoint (503 until the model is loaded and warmed up)"""
+    body, status = health_status()
+    return jsonify(body), status
 
 @app.route('/api/predict', methods=['POST'])
 def predict():
     """Predict skin disease from uploaded image"""
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded'}), 400
+    timer = StageTimer()
+    with timer.stage('read'):
+        file = request.files.get('file')
+    if file is None or file.filename == '':
+        metrics.observe_error('predict', 'MissingFile')
+        return jsonify({'error': 'No file uploaded' if file is None else 'No file selected'}), 400
     
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+    selection = request_param('model') or registry.default
+    try:
+        members = registry.members(selection)
+        tiling = parse_tiling(request_param)
+    except ValueError as e:
+        # UnknownModel or invalid tiling options
+        metrics.observe_error('predict', e)
+        return jsonify({'error': str(e)}), 400
+    if tiling and members != [selection]:
+        metrics.observe_error('predict', 'InvalidTiling')
+        return jsonify({'error': 'Tiled predictions support single models only'}), 400
     
     try:
-        # Read and preprocess image
-        image_bytes = file.read()
-        img_array = preprocess_image(image_bytes)
-        
-        # Make prediction
-        predictions = model.predict(img_array, verbose=0)
-        pred_index = np.argmax(predictions[0])
-        confidence = float(predictions[0][pred_index])
-        predicted_class = MODEL_CLASSES[pred_index]
-        
-        # Get disease info from database
-        disease_info = DISEASE_DATABASE.get(predicted_class, {})
-        
-        # Get related conditions
-        related_conditions = get_related_conditions(predicted_class)
+        # Checked and hashed in place; the spooled file is never copied into memory
+        with timer.stage('read'):
+            upload = Upload(file.stream)
+    except UnsupportedImage as e:
+        metrics.observe_error('predict', e)
+        return jsonify({'error': str(e)}), 415
+    
+    if not ensure_model():
+        metrics.observe_error('predict', 'ModelUnavailable')
+        return jsonify({'error': f"Model unavailable: {model_state['error']}"}), 503
+    
+    try:
+        # Decoded from the upload stream once for the models the selection always runs
+        image = decode_upload(upload, selection, timer, tiling)
         
-        # Get top 3 predictions
-        top_indices = np.argsort(predictions[0])[-3:][::-1]
-        top_predictions = [
-            {
-                'class': MODEL_CLASSES[i],
-                'confidence': float(predictions[0][i]),
-                'category': DISEASE_DATABASE.get(MODEL_CLASSES[i], {}).get('category', 'Unknown')
-            }
-            for i in top_indices
-        ]
+        probabilities, classes, model_info, tiles = run_prediction(
+            selection, upload, image, tiling, timer
+        )
         
-        return jsonify({
-            'success': True,
-            'prediction': {
-                'class': predicted_class,
-                'confidence': confidence,
-                'category': disease_info.get('category', 'Unknown'),
-                'description': disease_info.get('description', ''),
-                'symptoms': disease_info.get('symptoms', []),
-                'causes': disease_info.get('causes', []),
-                'recommendation': disease_info.get('recommendation', 'Please consult a healthcare professional.'),
-                'severity': disease_info.get('severity', 'unknown'),
-                'contagious': disease_info.get('contagious', False)
-            },
-            'top_predictions': top_predictions,
-            'related_conditions': related_conditions
-        })
+        with timer.stage('postprocess'):
+            result = build_prediction_result(probabilities, classes)
+            if tiles is not None:
+                result['tiles'] = tiles
+        with timer.stage('json'):
+            response = jsonify({'success': True, **result, 'model': model_info})
+        response.headers['Server-Timing'] = timer.server_timing()
+        record_prediction_metrics(upload, image, timer, result, model_info)
+        return response
         
+    except UnsupportedImage as e:
+        # Right signature, corrupt or truncated data
+        metrics.observe_error('predict', e)
+        return jsonify({'error': str(e)}), 415
+    except ImageTooLarge as e:
+        metrics.observe_error('predict', e)
+        return jsonify({'error': str(e)}), 413
+    except FileNotFoundError as e:
+        metrics.observe_error('predict', e)
+        return jsonify({'error': f'Model unavailable: {e}'}), 503
+    except BatcherOverloaded as e:
+        metrics.observe_error('predict', e)
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
+        metrics.observe_error('predict', e)
+        print(f"❌ Prediction failed: {e!r}")
+        traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/diseases', methods=['GET'])
-def get_all_diseases():
-    """Get comprehensive list of all diseases in database"""
-    diseases = []
-    for name, info in DISEASE_DATABASE.items():
-        diseases.append({
-            'name': name,
-            'category': info.get('category', 'Unknown'),
-            'severity': info.get('severity', 'unknown'),
-            'contagious': info.get('contagious', False),
-            'detectable': info.get('detectable', False),
-            'description': info.get('description', '')[:200] + '...'
-        })
+def _is_image_member(name):
+    """Skip hidden files and macOS metadata inside archives"""
+    basename = os.path.basename(name)
+    return bool(basename) and not basename.startswith('.') and '__MACOSX/' not in name
+
+def _spool_member(stream, size):
+    """A checked, spooled copy of an archive member, or the error that rejected it"""
+    try:
+        return spool_member(stream, size)
+    except (UploadTooLarge, UnsupportedImage) as e:
+        return e
+
+def iter_upload_images(files):
+    """Yield (filename, image stream or rejection error) for uploads, expanding zip/tar archives.
+    
+    Archive members are checked from their headers and spooled (to disk
+    beyond SPOOL_MAX_BYTES), so no member is ever held in memory whole.
+    """
+    for file in files:
+        filename = file.filename.lower()
+        if filename.endswith('.zip') or file.mimetype in ('application/zip', 'application/x-zip-compressed'):
+            with zipfile.ZipFile(file.stream) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and _is_image_member(info.filename):
+                        with archive.open(info) as member:
+                            yield info.filename, _spool_member(member, info.file_size)
+        elif filename.endswith(('.tar', '.tar.gz', '.tgz')) or file.mimetype in ('application/x-tar', 'application/gzip'):
+            # Stream mode: members are read one at a time, never the whole archive
+            with tarfile.open(fileobj=file.stream, mode='r|*') as archive:
+                for member in archive:
+                    if member.isfile() and _is_image_member(member.name):
+                        yield member.name, _spool_member(archive.extractfile(member), member.size)
+        else:
+            # Decoded straight from the spooled upload
+            yield file.filename, file.stream
+
+def preprocess_upload(source, size):
+    """Preprocess one batch item, closing its stream once decoded"""
+    with source:
+        return preprocess_image(source, size)
+
+def iter_batch_predictions(images, loaded):
+    """Preprocess images on a worker pool and predict them in fixed-size batches.
+    
+    At most 3 * PREDICT_BATCH_SIZE images are held in memory at any time: the
+    batch being predicted plus the next ones being decoded in the background.
+    """
+    images = iter(images)
+    pending = deque()
+    read_error = None
+    
+    def fill(pool):
+        nonlocal images, read_error
+        try:
+            while len(pending) < 2 * PREDICT_BATCH_SIZE:
+                name, source = next(images)
+                if isinstance(source, Exception):
+                    future = Future()
+                    future.set_exception(source)
+                else:
+                    future = pool.submit(preprocess_upload, source, loaded.input_size)
+                pending.append((name, future))
+        except StopIteration:
+            pass
+        except Exception as e:
+            # Corrupt archive: finish what was already read, then report it
+            read_error = e
+            images = iter(())
     
-    # Sort by category
-    diseases.sort(key=lambda x: (not x['detectable'], x['category'], x['name']))
+    index = 0
+    with ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS) as pool:
+        fill(pool)
+        while pending:
+            chunk = [pending.popleft() for _ in range(min(PREDICT_BATCH_SIZE, len(pending)))]
+            fill(pool)  # Keep decoding the next batch while this one runs
+            
+            results = [None] * len(chunk)
+            decoded = []
+            for i, (_, future) in enumerate(chunk):
+                try:
+                    decoded.append((i, future.result()))
+                except Exception as e:
+                    results[i] = {'success': False, 'error': str(e)}
+            
+            if decoded:
+                try:
+                    predictions = loaded.predict_batch(np.concatenate([arr for _, arr in decoded]))
+                    for (i, _), probabilities in zip(decoded, predictions):
+                        results[i] = {'success': True, **build_prediction_result(probabilities, loaded.classes)}
+                except Exception as e:
+                    for i, _ in decoded:
+                        results[i] = {'success': False, 'error': str(e)}
+            
+            for (name, _), result in zip(chunk, results):
+                yield {'index': index, 'filename': name, **result}
+                index += 1
     
-    return jsonify({
-        'diseases': diseases,
-        'total': len(diseases),
-        'detectable_count': sum(1 for d in diseases if d['detectable']),
-        'categories': list(set(d['category'] for d in diseases))
-    })
-
-@app.route('/api/disease/<name>', methods=['GET'])
-def get_disease_info(name):
-    """Get detailed info about a specific disease"""
-    # Find disease (case-insensitive)
-    for disease_name, info in DISEASE_DATABASE.items():
-        if disease_name.lower() == name.lower():
-            return jsonify({
-                'name': disease_name,
-                **info
-            })
+    if read_error is not None:
+        yield {'index': index, 'filename': None, 'success': False, 'error': f'Could not read upload: {read_error}'}
+
+def record_batch_item_metrics(selection, result):
+    """Count one /api/predict/batch result by class, or as an error"""
+    if result['success']:
+        metrics.observe_prediction(selection, result['prediction']['class'])
+    else:
+        metrics.observe_error('predict_batch', 'ImageError')
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """Predict many images, streaming one NDJSON line per image as batches finish"""
+    # Archives of many images may exceed the single-upload limit
+    request.max_content_length = MAX_BATCH_UPLOAD_BYTES
+    # Clinic sets of thousands of photos, past Flask's default of 1000 form parts
+    request.max_form_parts = MAX_BATCH_FILES + MAX_BATCH_FIELDS
+    files = [
+        f for f in request.files.getlist('files') + request.files.getlist('file')
+        if f.filename != ''
+    ]
+    if not files:
+        return jsonify({'error': 'No files uploaded'}), 400
+    
+    selection = request_param('model') or registry.default
+    try:
+        if registry.members(selection) != [selection]:
+            return jsonify({'error': 'Batch predictions support single models only'}), 400
+    except UnknownModel as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({'error': 'Disease not found'}), 404
+    if not ensure_model():
+        return jsonify({'error': f"Model unavailable: {model_state['error']}"}), 503
+    try:
+        loaded = registry.get(selection)
+    except Exception as e:
+        return jsonify({'error': f'Model unavailable: {e}'}), 503
+    
+    # Flask closes request.files as soon as this view returns, before the
+    # response body is streamed, so take ownership of the upload streams
+    uploads = []
+    for f in files:
+        uploads.append(FileStorage(f.stream, filename=f.filename, content_type=f.content_type))
+        f.stream = io.BytesIO()
+    
+    def generate():
+        try:
+            for result in iter_batch_predictions(iter_upload_images(uploads), loaded):
+                record_batch_item_metrics(selection, result)
+                yield json.dumps(result) + '\n'
+        finally:
+            for upload in uploads:
+                upload.close()
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/models', methods=['GET'])
+def get_models():
+    """List servable models with their load state and latency"""
+    return jsonify(registry.stats())
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics (summed over workers under gunicorn)"""
+    metrics.update_memory(registry, force=True)
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    """JSON 413 for requests over MAX_UPLOAD_MB (MAX_BATCH_UPLOAD_MB for batches)
+    or with more multipart parts than request.max_form_parts"""
+    endpoint = request.blueprint or request.endpoint or 'unmatched'
+    limit = request.max_content_length or 0
+    if request.content_length is not None and request.content_length <= limit:
+        # Within the size limit, so the multipart parser counted too many parts
+        metrics.observe_error(endpoint, 'TooManyParts')
+        return jsonify({'error': f'Too many files in one upload (limit {request.max_form_parts} files and fields)'}), 413
+    metrics.observe_error(endpoint, 'UploadTooLarge')
+    return jsonify({'error': f'Upload too large (limit {limit / (1024 * 1024):g} MB)'}), 413
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed responses are measured to their first byte
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe_request(endpoint, request.method, response.status_code, time.perf_counter() - started)
+    return response
 
 if __name__ == '__main__':
     print("🏥 Comprehensive Skin Disease Classifier API")
     print("=" * 60)
-    load_model()
+    init_model()
     print("=" * 60)
     print(f"✅ Detectable diseases: {', '.join(MODEL_CLASSES)}")
     print(f"📚 Total diseases in database: {len(DISEASE_DATABASE)}")
+    print(f"🧠 Models: {', '.join(registry.selections)} (default: {registry.default})")
+    print(f"📦 Micro-batching: up to {BATCH_MAX_SIZE} images / {BATCH_MAX_WAIT_MS:g} ms")
     print("=" * 60)
     print("Server starting on http://localhost:5001")
     print("=" * 60)
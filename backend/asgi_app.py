@@ -0,0 +1,478 @@
+"""
+ASGI serving mode for the same API, run under uvicorn:
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port $PORT --workers 2
+
+Compared with the synchronous gunicorn workers serving app.py:
+
+- request bodies are read asynchronously, so a slow mobile upload holds no
+  thread while it trickles in;
+- decoding and preprocessing run on a PREPROCESS_WORKERS thread pool and
+  model calls on a dedicated inference executor, so the event loop never
+  blocks;
+- at most ASGI_MAX_IN_FLIGHT prediction requests are admitted at once,
+  counted once their body has been read so slow uploads don't hold a slot;
+  beyond that requests get 503 with Retry-After instead of piling up.
+
+Models, micro-batching, the prediction cache and response bodies are shared
+with app.py.
+"""
+import asyncio
+import json
+import os
+import shutil
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Match, Route
+from werkzeug.datastructures import FileStorage
+
+import app as api
+import metrics
+from batching import BatcherOverloaded
+from catalog_routes import CATALOG_MAX_AGE, parse_bool
+from disease_catalog import DISEASE_BODIES, disease_list_body, find_disease
+from job_routes import enqueue_job, get_job_queue, parse_job_request
+from model_registry import UnknownModel
+from preprocessing import ImageTooLarge
+from timing import StageTimer
+from uploads import (
+    MAX_BATCH_FIELDS, MAX_BATCH_FILES, MAX_BATCH_UPLOAD_BYTES, MAX_UPLOAD_BYTES, UnsupportedImage, Upload,
+    UploadTooLarge, check_image
+)
+
+ASGI_MAX_IN_FLIGHT = int(os.environ.get('ASGI_MAX_IN_FLIGHT', 64))
+ASGI_RETRY_AFTER = int(os.environ.get('ASGI_RETRY_AFTER', 1))
+
+decode_pool = ThreadPoolExecutor(max_workers=api.PREPROCESS_WORKERS, thread_name_prefix='decode')
+# A model call blocks its thread until the micro-batch it joined completes,
+# so the executor needs a thread per admitted request for batches to fill
+inference_pool = ThreadPoolExecutor(max_workers=ASGI_MAX_IN_FLIGHT, thread_name_prefix='inference')
+
+
+class _Admission:
+    """Bounded in-flight counter (only touched from the event loop)"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self.rejected = 0
+
+    def try_acquire(self):
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+    def stats(self):
+        return {'in_flight': self.in_flight, 'max_in_flight': self.limit, 'rejected': self.rejected}
+
+
+admission = _Admission(ASGI_MAX_IN_FLIGHT)
+
+
+def _error(message, status_code, retry=False):
+    headers = {'Retry-After': str(ASGI_RETRY_AFTER)} if retry else None
+    return JSONResponse({'error': message}, status_code=status_code, headers=headers)
+
+
+def _busy(endpoint):
+    metrics.observe_error(endpoint, 'Overloaded')
+    return _error('Server busy, please retry shortly', 503, retry=True)
+
+
+async def _run(pool, fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+
+async def _ensure_model():
+    if api.model_state['status'] == 'ready' and api.model_state['pid'] == os.getpid():
+        return True
+    return await _run(inference_pool, api.ensure_model)
+
+
+def _is_upload(value):
+    return value is not None and not isinstance(value, str) and bool(value.filename)
+
+
+async def health_check(request):
+    """Health check endpoint (503 until the model is loaded and warmed up)"""
+    body, status = api.health_status()
+    body['asgi'] = admission.stats()
+    return JSONResponse(body, status_code=status)
+
+
+async def predict(request):
+    """Predict skin disease from uploaded image"""
+    timer = StageTimer()
+    with timer.stage('read'):
+        form = await request.form()
+    try:
+        # Admitted only once the body is in (its size is capped by
+        # UploadLimitMiddleware), so slow uploads don't hold a slot
+        if not admission.try_acquire():
+            return _busy('predict')
+        try:
+            return await _predict_form(request, form, timer)
+        finally:
+            admission.release()
+    finally:
+        # Closes the spooled upload, which is decoded in place
+        await form.close()
+
+
+async def _predict_form(request, form, timer):
+    file = form.get('file')
+    if not _is_upload(file):
+        metrics.observe_error('predict', 'MissingFile')
+        return _error('No file uploaded' if file is None else 'No file selected', 400)
+    params = {
+        name: form.get(name) or request.query_params.get(name)
+        for name in ('model', 'tiles', 'overlap', 'merge')
+    }
+
+    selection = params['model'] or api.registry.default
+    try:
+        members = api.registry.members(selection)
+        tiling = api.parse_tiling(params.get)
+    except ValueError as e:
+        # UnknownModel or invalid tiling options
+        metrics.observe_error('predict', e)
+        return _error(str(e), 400)
+    if tiling and members != [selection]:
+        metrics.observe_error('predict', 'InvalidTiling')
+        return _error('Tiled predictions support single models only', 400)
+
+    try:
+        with timer.stage('read'):
+            upload = await _run(decode_pool, Upload, file.file)
+    except UnsupportedImage as e:
+        metrics.observe_error('predict', e)
+        return _error(str(e), 415)
+
+    if not await _ensure_model():
+        metrics.observe_error('predict', 'ModelUnavailable')
+        return _error(f"Model unavailable: {api.model_state['error']}", 503)
+
+    try:
+        image = await _run(decode_pool, api.decode_upload, upload, selection, timer, tiling)
+        probabilities, classes, model_info, tiles = await _run(
+            inference_pool, api.run_prediction, selection, upload, image, tiling, timer
+        )
+        with timer.stage('postprocess'):
+            result = api.build_prediction_result(probabilities, classes)
+            if tiles is not None:
+                result['tiles'] = tiles
+        with timer.stage('json'):
+            response = JSONResponse({'success': True, **result, 'model': model_info})
+        response.headers['Server-Timing'] = timer.server_timing()
+        api.record_prediction_metrics(upload, image, timer, result, model_info)
+        return response
+    except UnsupportedImage as e:
+        # Right signature, corrupt or truncated data
+        metrics.observe_error('predict', e)
+        return _error(str(e), 415)
+    except ImageTooLarge as e:
+        metrics.observe_error('predict', e)
+        return _error(str(e), 413)
+    except FileNotFoundError as e:
+        metrics.observe_error('predict', e)
+        return _error(f'Model unavailable: {e}', 503)
+    except BatcherOverloaded as e:
+        metrics.observe_error('predict', e)
+        return _error(str(e), 503, retry=True)
+    except Exception as e:
+        metrics.observe_error('predict', e)
+        print(f"❌ Prediction failed: {e!r}")
+        traceback.print_exc()
+        return _error(str(e), 500)
+
+
+async def predict_batch(request):
+    """Predict many images, streaming one NDJSON line per image as batches finish"""
+    # Clinic sets of thousands of photos, past Starlette's default of 1000 files
+    form = await request.form(max_files=MAX_BATCH_FILES, max_fields=MAX_BATCH_FIELDS)
+    # As for /api/predict, the slot is taken once the upload is in
+    if not admission.try_acquire():
+        await form.close()
+        return _busy('predict_batch')
+    try:
+        response = await _predict_batch(request, form)
+    except BaseException:
+        admission.release()
+        raise
+    if not isinstance(response, StreamingResponse):
+        admission.release()
+    return response
+
+
+async def _predict_batch(request, form):
+    files = [f for f in form.getlist('files') + form.getlist('file') if _is_upload(f)]
+    if not files:
+        await form.close()
+        return _error('No files uploaded', 400)
+
+    selection = form.get('model') or request.query_params.get('model') or api.registry.default
+    try:
+        if api.registry.members(selection) != [selection]:
+            await form.close()
+            return _error('Batch predictions support single models only', 400)
+    except UnknownModel as e:
+        await form.close()
+        return _error(str(e), 400)
+
+    try:
+        if not await _ensure_model():
+            raise RuntimeError(api.model_state['error'])
+        loaded = await _run(inference_pool, api.registry.get, selection)
+    except Exception as e:
+        await form.close()
+        return _error(f'Model unavailable: {e}', 503)
+
+    uploads = [FileStorage(f.file, filename=f.filename, content_type=f.content_type) for f in files]
+    def lines():
+        for result in api.iter_batch_predictions(api.iter_upload_images(uploads), loaded):
+            api.record_batch_item_metrics(selection, result)
+            yield json.dumps(result) + '\n'
+
+    async def stream():
+        # The archive is read and the model run on worker threads; the
+        # admission slot is held until the last line is sent
+        try:
+            async for line in iterate_in_threadpool(lines()):
+                yield line
+        finally:
+            await form.close()
+            admission.release()
+
+    return StreamingResponse(stream(), media_type='application/x-ndjson')
+
+
+async def submit_job(request):
+    """Queue an image for prediction and return its job id right away"""
+    async with request.form() as form:
+        upload = form.get('file')
+        if not _is_upload(upload):
+            metrics.observe_error('jobs', 'MissingFile')
+            return _error('No file uploaded' if upload is None else 'No file selected', 400)
+        try:
+            selection, options = parse_job_request(lambda name: form.get(name) or request.query_params.get(name))
+        except ValueError as e:
+            metrics.observe_error('jobs', e)
+            return _error(str(e), 400)
+        try:
+            check_image(upload.file)
+        except UnsupportedImage as e:
+            metrics.observe_error('jobs', e)
+            return _error(str(e), 415)
+
+        def save_upload(path):
+            with open(path, 'wb') as f:
+                shutil.copyfileobj(upload.file, f)
+
+        job_id = await _run(decode_pool, enqueue_job, save_upload, selection, options)
+    status_url = f'/api/jobs/{job_id}'
+    return JSONResponse({'job_id': job_id, 'status': 'queued', 'status_url': status_url},
+                        status_code=202, headers={'Location': status_url})
+
+
+async def get_job_stats(request):
+    """Number of jobs per status"""
+    return JSONResponse(await _run(decode_pool, get_job_queue().stats))
+
+
+async def get_job(request):
+    """Status of a job, with its prediction once done or its error if it failed"""
+    job = await _run(decode_pool, get_job_queue().get, request.path_params['job_id'])
+    if job is None:
+        return _error('Job not found', 404)
+    return JSONResponse(job)
+
+
+async def get_models(request):
+    """List servable models with their load state and latency"""
+    return JSONResponse(api.registry.stats())
+
+
+async def get_metrics(request):
+    """Prometheus metrics (summed over workers when PROMETHEUS_MULTIPROC_DIR is set)"""
+    metrics.update_memory(api.registry, force=True)
+    body, content_type = metrics.render()
+    return Response(body, headers={'Content-Type': content_type})
+
+
+def _catalog_response(request, body, etag):
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': f'public, max-age={CATALOG_MAX_AGE}'}
+    if_none_match = request.headers.get('if-none-match', '')
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    if headers['ETag'] in tags or if_none_match.strip() == '*':
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
+
+
+async def get_all_diseases(request):
+    """Get comprehensive list of all diseases in database"""
+    try:
+        contagious = parse_bool(request.query_params.get('contagious'))
+    except ValueError:
+        return _error("contagious must be 'true' or 'false'", 400)
+    body, etag = disease_list_body(
+        request.query_params.get('category'),
+        request.query_params.get('severity'),
+        contagious
+    )
+    return _catalog_response(request, body, etag)
+
+
+async def get_disease_info(request):
+    """Get detailed info about a specific disease"""
+    disease_name = find_disease(request.path_params['name'])
+    if disease_name is None:
+        return _error('Disease not found', 404)
+    return _catalog_response(request, *DISEASE_BODIES[disease_name])
+
+
+class RequestMetricsMiddleware:
+    """Record latency per route, method and status (streamed responses to their first byte)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _route_path(scope):
+        # Starlette only records the matched route in the scope from 1.7
+        partial = 'unmatched'
+        for route in scope['app'].routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL and partial == 'unmatched':
+                partial = route.path
+        return partial
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+
+        async def send_and_record(message):
+            if message['type'] == 'http.response.start':
+                metrics.observe_request(
+                    self._route_path(scope), scope['method'], message['status'],
+                    time.perf_counter() - started
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_and_record)
+
+
+# Error labels of the upload routes, as used by their handlers
+UPLOAD_ENDPOINTS = {
+    '/api/predict': 'predict',
+    '/api/predict/batch': 'predict_batch',
+    '/api/jobs': 'jobs'
+}
+
+
+class UploadLimitMiddleware:
+    """413 for request bodies over MAX_UPLOAD_MB (MAX_BATCH_UPLOAD_MB for batches).
+
+    A declared Content-Length is checked before any of the body is read;
+    chunked bodies are counted as they arrive and cut off at the limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        limit = MAX_BATCH_UPLOAD_BYTES if scope['path'] == '/api/predict/batch' else MAX_UPLOAD_BYTES
+        # Fixed labels only: the path comes from the client
+        endpoint = UPLOAD_ENDPOINTS.get(scope['path'].rstrip('/'), 'unmatched')
+        headers = dict(scope['headers'])
+        declared = headers.get(b'content-length', b'')
+        if declared.isdigit() and int(declared) > limit:
+            return await self._reject(scope, receive, send, endpoint, limit)
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > limit:
+                    raise UploadTooLarge()
+            return message
+
+        async def tracked_send(message):
+            nonlocal started
+            started = started or message['type'] == 'http.response.start'
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except UploadTooLarge:
+            if started:
+                raise
+            await self._reject(scope, receive, send, endpoint, limit)
+
+    async def _reject(self, scope, receive, send, endpoint, limit):
+        metrics.observe_error(endpoint, 'UploadTooLarge')
+        response = _error(f'Upload too large (limit {limit / (1024 * 1024):g} MB)', 413)
+        await response(scope, receive, send)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Load and warm up the model before uvicorn starts accepting requests
+    await _run(inference_pool, api.init_model)
+    yield
+    decode_pool.shutdown(wait=False)
+    inference_pool.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route('/api/health', health_check, methods=['GET']),
+        Route('/api/predict', predict, methods=['POST']),
+        Route('/api/predict/batch', predict_batch, methods=['POST']),
+        Route('/api/jobs', submit_job, methods=['POST']),
+        Route('/api/jobs', get_job_stats, methods=['GET']),
+        Route('/api/jobs/{job_id}', get_job, methods=['GET']),
+        Route('/api/models', get_models, methods=['GET']),
+        Route('/metrics', get_metrics, methods=['GET']),
+        Route('/api/diseases', get_all_diseases, methods=['GET']),
+        Route('/api/disease/{name}', get_disease_info, methods=['GET'])
+    ],
+    middleware=[
+        Middleware(RequestMetricsMiddleware),
+        # Outside the upload limit, so its 413s carry CORS headers too
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+        Middleware(UploadLimitMiddleware)
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(
+        'asgi_app:app',
+        host='0.0.0.0',
+        port=int(os.environ.get('PORT', 5001)),
+        workers=int(os.environ.get('WEB_CONCURRENCY', 1))
+    )
@@ -0,0 +1,182 @@
+"""
+Dynamic micro-batching for model inference.
+
+Requests arriving on different threads are queued and grouped into a single
+batch (up to ``max_batch_size`` samples, or whatever has arrived within
+``max_wait_ms`` of the first one) before being sent through the model in one
+call. Each caller blocks on its own future and gets back its own row of the
+batch output.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatcherOverloaded(RuntimeError):
+    """Raised when the batching queue is full and a request cannot be accepted"""
+
+
+class _Histogram:
+    """Fixed-bucket counter histogram (bucket = inclusive upper bound)"""
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += 1
+        self.sum += value
+
+    def as_dict(self):
+        buckets = {f'<={b}': c for b, c in zip(self.bounds, self.counts)}
+        buckets[f'>{self.bounds[-1]}'] = self.counts[-1]
+        return {
+            'buckets': buckets,
+            'count': self.total,
+            'mean': round(self.sum / self.total, 3) if self.total else 0.0
+        }
+
+
+def _power_of_two_bounds(limit):
+    bounds = [1]
+    while bounds[-1] < limit:
+        bounds.append(bounds[-1] * 2)
+    return bounds
+
+
+class MicroBatcher:
+    """Groups single-sample predictions into batched model calls.
+
+    ``predict_fn`` receives a stacked ``(N, *sample_shape)`` array and must
+    return an array whose first dimension is ``N``.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=10.0,
+                 max_queue_size=1024, name='model'):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000.0
+        self.max_queue_size = int(max_queue_size)
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._batch_sizes = _Histogram(_power_of_two_bounds(self.max_batch_size))
+        self._queue_depths = _Histogram(_power_of_two_bounds(self.max_queue_size))
+        self._requests = 0
+        self._batches = 0
+        self._rejected = 0
+        self._errors = 0
+        self._max_queue_depth = 0
+        self._inference_seconds = 0.0
+
+    def _ensure_started(self):
+        # The worker thread is started lazily so that the batcher can be
+        # created before gunicorn forks: each worker process gets its own
+        # queue and thread on first use.
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.max_queue_size)
+            self._reset_stats()
+            self._thread = threading.Thread(
+                target=self._run, name=f'microbatcher-{self.name}', daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, sample):
+        """Queue one sample (without batch dimension) and return a Future"""
+        self._ensure_started()
+        future = Future()
+        try:
+            self._queue.put_nowait((np.asarray(sample), future))
+        except queue.Full:
+            self._rejected += 1
+            raise BatcherOverloaded(
+                f"Inference queue is full ({self.max_queue_size} pending requests)"
+            )
+        self._requests += 1
+        return future
+
+    def predict(self, sample, timeout=None):
+        """Run one sample through the model and return its output row"""
+        return self.submit(sample).result(timeout=timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            depth = self._queue.qsize()
+            self._queue_depths.observe(depth)
+            self._max_queue_depth = max(self._max_queue_depth, depth + len(batch))
+            self._batch_sizes.observe(len(batch))
+            self._batches += 1
+
+            samples = [sample for sample, _ in batch]
+            futures = [future for _, future in batch]
+            started = time.perf_counter()
+            try:
+                outputs = np.asarray(self.predict_fn(np.stack(samples)))
+            except Exception as e:
+                self._errors += 1
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            finally:
+                self._inference_seconds += time.perf_counter() - started
+
+            for i, future in enumerate(futures):
+                future.set_result(outputs[i])
+
+    def stats(self):
+        """Queue depth and batch size statistics for tuning"""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'max_queue_size': self.max_queue_size,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'max_queue_depth': self._max_queue_depth,
+            'requests': self._requests,
+            'rejected': self._rejected,
+            'errors': self._errors,
+            'batches': self._batches,
+            'inference_seconds': round(self._inference_seconds, 4),
+            'batch_size_histogram': self._batch_sizes.as_dict(),
+            'queue_depth_histogram': self._queue_depths.as_dict()
+        }
@@ -0,0 +1,217 @@
+"""
+Load benchmark: throughput, tail latency, stage times and memory of the API.
+
+Starts a local server (gunicorn or uvicorn) on a stand-in model with the
+same 150x150x3 input and class count as skin_disease_model.h5, so it runs
+offline, then drives /api/predict with a synthetic corpus of photos of
+varied sizes and formats, and /api/diseases and /api/disease/<name>, at
+each requested concurrency. Per-stage server times (read, decode,
+preprocess, inference, postprocess, json) come from the Server-Timing
+header.
+
+Results are saved as JSON; pass a previous run as --baseline to see how a
+commit moved the numbers.
+
+    python benchmarks/bench_load.py --concurrency 1,8,32 --output results.json
+    python benchmarks/bench_load.py --baseline results.json
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from urllib.parse import quote
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from loadgen import (  # noqa: E402
+    Request, RSSSampler, free_port, multipart_body, run_load, start_server, stop_server, summarize
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# (width, height, format): phone photos in both orientations, a scan-sized
+# PNG, web-sized uploads and a thumbnail at the model's own input size
+CORPUS_SHAPES = [
+    (4032, 3024, 'JPEG'),
+    (3024, 4032, 'JPEG'),
+    (1920, 1080, 'JPEG'),
+    (1280, 960, 'WEBP'),
+    (1024, 1024, 'PNG'),
+    (800, 600, 'JPEG'),
+    (640, 480, 'PNG'),
+    (150, 150, 'JPEG')
+]
+
+STAND_IN = """
+import sys
+import tensorflow as tf
+from disease_catalog import MODEL_CLASSES
+tf.keras.utils.set_random_seed(0)
+model = tf.keras.Sequential([
+    tf.keras.Input((150, 150, 3)),
+    tf.keras.layers.Conv2D(16, 3, strides=2, activation='relu'),
+    tf.keras.layers.Conv2D(32, 3, strides=2, activation='relu'),
+    tf.keras.layers.GlobalAveragePooling2D(),
+    tf.keras.layers.Dense(len(MODEL_CLASSES), activation='softmax')
+])
+model.save(sys.argv[1])
+"""
+
+
+def stand_in_model_dir():
+    """Directory with a stand-in skin_disease_model.h5 (built once, then reused)"""
+    model_dir = os.path.join(tempfile.gettempdir(), 'skin-disease-bench-models')
+    path = os.path.join(model_dir, 'skin_disease_model.h5')
+    if not os.path.exists(path):
+        os.makedirs(model_dir, exist_ok=True)
+        print(f"Building stand-in model at {path}...")
+        proc = subprocess.run([sys.executable, '-c', STAND_IN, path], cwd=BACKEND_DIR,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            sys.exit(f"❌ Building the stand-in model failed:\n{proc.stderr}")
+    return model_dir
+
+
+def synthetic_photo(width, height, fmt, seed):
+    """Smooth noise with some skin-like tint; compresses like a real photo"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (max(height // 32, 2), max(width // 32, 2), 3), dtype=np.uint8)
+    coarse = (coarse * 0.4 + np.array([200, 150, 120]) * 0.6).astype(np.uint8)
+    img = Image.fromarray(coarse).resize((width, height), Image.BICUBIC)
+    buffer = io.BytesIO()
+    img.save(buffer, fmt, **({'quality': 90} if fmt in ('JPEG', 'WEBP') else {}))
+    return buffer.getvalue()
+
+
+def build_corpus(copies):
+    """Distinct uploads (so the prediction cache doesn't hide the model)"""
+    corpus = []
+    for copy in range(copies):
+        for i, (width, height, fmt) in enumerate(CORPUS_SHAPES):
+            data = synthetic_photo(width, height, fmt, seed=copy * len(CORPUS_SHAPES) + i)
+            corpus.append((f'{width}x{height}.{fmt.lower()}', data))
+    return corpus
+
+
+def scenarios(corpus, tiles=None):
+    """Request templates per benchmarked endpoint"""
+    from disease_catalog import DISEASE_DATABASE
+
+    predict = []
+    fields = {'tiles': tiles} if tiles else None
+    for filename, data in corpus:
+        body, content_type = multipart_body(fields, files=[('file', filename, data)])
+        predict.append(Request('POST', '/api/predict', body, content_type))
+    return {
+        'predict': predict,
+        'diseases': [
+            Request('GET', path, name='GET /api/diseases')
+            for path in ('/api/diseases', '/api/diseases?severity=moderate', '/api/diseases?contagious=true')
+        ],
+        'disease': [
+            Request('GET', f'/api/disease/{quote(name)}', name='GET /api/disease/<name>')
+            for name in DISEASE_DATABASE
+        ]
+    }
+
+
+def server_command(server, port, workers):
+    if server == 'uvicorn':
+        return [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--host', '127.0.0.1',
+                '--port', str(port), '--workers', str(workers), '--no-access-log']
+    return [sys.executable, '-m', 'gunicorn', 'app:app', '-c', 'gunicorn.conf.py',
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers)]
+
+
+def git_commit():
+    proc = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True)
+    return proc.stdout.strip() or None
+
+
+def print_results(results, baseline=None):
+    header = (f"{'endpoint':<9} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'peak RSS':>9}  stages (mean ms)")
+    print(header)
+    print('-' * len(header))
+    for endpoint, runs in results.items():
+        for concurrency, r in runs.items():
+            stages = ' '.join(f"{stage}={s['mean_ms']:.1f}" for stage, s in r['stages'].items())
+            print(f"{endpoint:<9} {concurrency:>5} {r['requests_per_s']:>8.1f} {r['p50_ms']:>8.1f} "
+                  f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['peak_rss_mb']:>8.0f}M  {stages}")
+            before = (baseline or {}).get(endpoint, {}).get(concurrency)
+            if before:
+                deltas = ' '.join(
+                    f"{key}={(r[key] - before[key]) / before[key]:+.1%}"
+                    for key in ('requests_per_s', 'p50_ms', 'p99_ms', 'peak_rss_mb') if before.get(key)
+                )
+                print(f"{'':<15} vs baseline: {deltas}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--server', choices=['gunicorn', 'uvicorn'], default='gunicorn')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--concurrency', type=lambda v: [int(x) for x in v.split(',')], default=[1, 8, 32])
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per endpoint and concurrency')
+    parser.add_argument('--endpoints', default='predict,diseases,disease')
+    parser.add_argument('--corpus-copies', type=int, default=4, help='distinct images per corpus shape')
+    parser.add_argument('--model-dir', help='serve real models from here instead of the stand-in')
+    parser.add_argument('--cache', action='store_true', help='leave the prediction cache on')
+    parser.add_argument('--tiles', type=int, help='request tiled inference with this grid size')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='previous JSON output to compare against')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.corpus_copies)
+    requests = scenarios(corpus, args.tiles)
+    env = {'MODEL_DIR': args.model_dir or stand_in_model_dir(), 'PRELOAD_MODELS': ''}
+    if not args.cache:
+        env['PREDICTION_CACHE_ENTRIES'] = '0'
+
+    port = free_port()
+    proc = start_server(server_command(args.server, port, args.workers), port, env=env, cwd=BACKEND_DIR)
+    results = {}
+    try:
+        # Warm up every path once before measuring
+        for endpoint in args.endpoints.split(','):
+            run_load('127.0.0.1', port, requests[endpoint], 2, total=len(requests[endpoint]))
+        for endpoint in args.endpoints.split(','):
+            for concurrency in args.concurrency:
+                with RSSSampler(proc) as rss:
+                    load, wall = run_load('127.0.0.1', port, requests[endpoint], concurrency, duration=args.duration)
+                (entry,) = load.values()
+                results.setdefault(endpoint, {})[str(concurrency)] = {
+                    **summarize(entry, wall), 'peak_rss_mb': rss.peak_mb
+                }
+    finally:
+        stop_server(proc)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'commit': git_commit(),
+                'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                'host': {'cpus': os.cpu_count(), 'python': platform.python_version(), 'machine': platform.machine()},
+                'config': vars(args),
+                'corpus': [{'name': name, 'bytes': len(data)} for name, data in corpus],
+                'results': results
+            }, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Microbenchmark: legacy vs. draft-mode preprocessing.
+
+Generates synthetic photos at several resolutions and formats, then times the
+original full-decode float64 path against preprocessing.preprocess_image.
+
+    python benchmarks/bench_preprocess.py --repeat 20
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocessing import legacy_preprocess_image, preprocess_image  # noqa: E402
+
+TARGET_SIZE = (150, 150)
+RESOLUTIONS = [(640, 480), (1920, 1080), (4032, 3024)]
+FORMATS = ['JPEG', 'PNG', 'WEBP']
+
+
+def synthetic_photo(width, height, fmt, seed=0):
+    """Smooth gradient plus noise, so codecs behave roughly like on a photo"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([
+        128 + 100 * np.sin(x / width * 6.0),
+        128 + 100 * np.cos(y / height * 4.0),
+        128 + 60 * np.sin((x + y) / (width + height) * 10.0)
+    ], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, fmt, quality=90)
+    return buf.getvalue()
+
+
+def time_per_image(fn, data, repeat):
+    fn(data, TARGET_SIZE)  # Warm up codec tables
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(data, TARGET_SIZE)
+    return (time.perf_counter() - started) / repeat * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help='iterations per case')
+    args = parser.parse_args()
+
+    header = f"{'format':<6} {'resolution':>11} {'size KB':>8} {'legacy ms':>10} {'new ms':>8} {'speedup':>8} {'max diff':>9}"
+    print(header)
+    print('-' * len(header))
+    for fmt in FORMATS:
+        for width, height in RESOLUTIONS:
+            data = synthetic_photo(width, height, fmt)
+            legacy_ms = time_per_image(legacy_preprocess_image, data, args.repeat)
+            new_ms = time_per_image(preprocess_image, data, args.repeat)
+            diff = np.abs(legacy_preprocess_image(data, TARGET_SIZE) - preprocess_image(data, TARGET_SIZE)).max()
+            print(f"{fmt:<6} {f'{width}x{height}':>11} {len(data) / 1024:>8.0f} "
+                  f"{legacy_ms:>10.2f} {new_ms:>8.2f} {legacy_ms / new_ms:>7.1f}x {diff:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Serving-mode benchmark: gunicorn (sync threads) vs. uvicorn (ASGI) on the same cores.
+
+Both servers are started with the same worker count, pinned to the same CPUs,
+and driven with /api/predict uploads. A share of the clients can trickle
+their uploads to mimic slow mobile links, which is where the async mode
+should keep serving the fast clients.
+
+    MODEL_DIR=models python benchmarks/bench_serving_modes.py --cpus 2 --concurrency 32 \\
+        --slow-fraction 0.5 --upload-kbps 64
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from loadgen import Request, free_port, multipart_body, run_load, start_server, stop_server, summarize  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def photo(width=1280, height=960, seed=0):
+    """A JPEG with enough detail to be representative to decode"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).resize((width, height), Image.BILINEAR).save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def server_commands(port, workers):
+    return {
+        'gunicorn': [sys.executable, '-m', 'gunicorn', 'app:app', '-c', 'gunicorn.conf.py',
+                     '--bind', f'127.0.0.1:{port}', '--workers', str(workers)],
+        'uvicorn': [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--host', '127.0.0.1',
+                    '--port', str(port), '--workers', str(workers), '--no-access-log']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', default='gunicorn,uvicorn')
+    parser.add_argument('--workers', type=int, default=1, help='server worker processes')
+    parser.add_argument('--cpus', type=int, help='pin both servers to this many cores (taskset)')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per mode')
+    parser.add_argument('--slow-fraction', type=float, default=0.0, help='share of clients uploading slowly')
+    parser.add_argument('--upload-kbps', type=float, default=64.0, help='slow client upload rate')
+    parser.add_argument('--images', type=int, default=16, help='distinct images (defeats the prediction cache)')
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args()
+
+    requests = []
+    for i in range(args.images):
+        body, content_type = multipart_body(files=[('file', f'{i}.jpg', photo(seed=i))])
+        requests.append(Request('POST', '/api/predict', body, content_type))
+
+    prefix = []
+    if args.cpus:
+        if not shutil.which('taskset'):
+            sys.exit("❌ --cpus needs taskset (util-linux)")
+        prefix = ['taskset', '-c', f'0-{args.cpus - 1}']
+
+    # Same in-flight budget for both modes; no prediction cache so every
+    # request pays for decode and inference
+    env = {'PREDICTION_CACHE_ENTRIES': '0', 'ASGI_MAX_IN_FLIGHT': str(args.concurrency)}
+    results = {}
+    for mode in args.modes.split(','):
+        port = free_port()
+        proc = start_server(prefix + server_commands(port, args.workers)[mode], port, env=env, cwd=BACKEND_DIR)
+        try:
+            run_load('127.0.0.1', port, requests[:2], 2, total=8)
+            load, wall = run_load(
+                '127.0.0.1', port, requests, args.concurrency, duration=args.duration,
+                upload_kbps=args.upload_kbps, slow_fraction=args.slow_fraction
+            )
+        finally:
+            stop_server(proc)
+        results[mode] = summarize(load['POST /api/predict'], wall)
+
+    header = f"{'mode':<10} {'req/s':>8} {'ok/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses"
+    print(header)
+    print('-' * len(header))
+    for mode, r in results.items():
+        print(f"{mode:<10} {r['requests_per_s']:>8.1f} {r['ok_per_s']:>8.1f} {r['p50_ms']:>9.1f} "
+              f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f}  {r['statuses']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Startup benchmark: import time and resident memory per process type.
+
+Each scenario runs in a fresh interpreter. "eager tensorflow" imports
+TensorFlow before the app, which is what every process paid before the
+import was made lazy.
+
+    python benchmarks/bench_startup.py --repeat 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    ('catalog service', 'import catalog_app'),
+    ('inference app (lazy)', 'import app'),
+    ('inference app + eager tensorflow', 'import tensorflow; import app'),
+    ('inference app + model ready', 'import app; app.init_model()')
+]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - started
+rss_kb = next(int(l.split()[1]) for l in open('/proc/self/status') if l.startswith('VmRSS:'))
+print(json.dumps({{'seconds': seconds, 'rss_mb': rss_kb / 1024.0, 'tensorflow': 'tensorflow' in sys.modules}}))
+"""
+
+
+def run(statement):
+    proc = subprocess.run(
+        [sys.executable, '-c', PROBE.format(statement=statement)],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='runs per scenario (best is reported)')
+    args = parser.parse_args()
+
+    header = f"{'scenario':<34} {'startup s':>10} {'RSS MB':>8} {'tensorflow':>11}"
+    print(header)
+    print('-' * len(header))
+    for name, statement in SCENARIOS:
+        runs = [r for r in (run(statement) for _ in range(args.repeat)) if r is not None]
+        if not runs:
+            print(f"{name:<34} {'failed':>10}")
+            continue
+        best = min(runs, key=lambda r: r['seconds'])
+        print(f"{name:<34} {best['seconds']:>10.2f} {best['rss_mb']:>8.0f} {str(best['tensorflow']):>11}")
+
+
+if __name__ == '__main__':
+    main()
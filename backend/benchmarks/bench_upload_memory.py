@@ -0,0 +1,128 @@
+"""
+Upload memory benchmark: peak server RSS per concurrent large upload.
+
+Starts a fresh single-worker server on the stand-in model for each
+concurrency, measures its idle resident memory, then keeps that many large
+uploads in flight on /api/predict and records the peak. The growth over idle,
+divided by the concurrency, is the memory each in-flight upload costs.
+
+Payloads are a 12 MP high-quality JPEG (a worst-case phone photo) and a
+non-image file of the same size, which should be rejected from its first
+bytes. The prediction cache is disabled so every upload is decoded.
+
+    python benchmarks/bench_upload_memory.py --output after.json
+    python benchmarks/bench_upload_memory.py --baseline before.json
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_load import BACKEND_DIR, git_commit, server_command, stand_in_model_dir  # noqa: E402
+from loadgen import (  # noqa: E402
+    Request, RSSSampler, free_port, multipart_body, process_tree_rss_mb, run_load, start_server, stop_server
+)
+
+
+def large_jpeg(width=4032, height=3024, quality=95, seed=0):
+    """Fine-grained noise, so the file stays close to its worst-case size"""
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def payloads():
+    photo = large_jpeg()
+    return {
+        'jpeg': ('photo.jpg', photo),
+        'non_image': ('photo.jpg', os.urandom(len(photo)))
+    }
+
+
+def measure(args, env, filename, data, concurrency):
+    """Idle and peak RSS (MB) of a fresh server with ``concurrency`` uploads in flight"""
+    body, content_type = multipart_body(files=[('file', filename, data)])
+    request = Request('POST', '/api/predict', body, content_type)
+    port = free_port()
+    proc = start_server(server_command(args.server, port, 1), port, env=env, cwd=BACKEND_DIR)
+    try:
+        # One request first, so lazily allocated state doesn't count as upload cost
+        run_load('127.0.0.1', port, [request], 1, total=1)
+        time.sleep(1.0)
+        idle = process_tree_rss_mb(proc)
+        with RSSSampler(proc, interval=0.02) as rss:
+            load, wall = run_load('127.0.0.1', port, [request], concurrency,
+                                  total=concurrency * args.rounds)
+    finally:
+        stop_server(proc)
+    (entry,) = load.values()
+    return {
+        'idle_rss_mb': idle,
+        'peak_rss_mb': rss.peak_mb,
+        'growth_mb': rss.peak_mb - idle,
+        'mb_per_upload': (rss.peak_mb - idle) / concurrency,
+        'statuses': {str(k): v for k, v in entry['statuses'].items()},
+        'requests_per_s': len(entry['latencies']) / wall
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--server', choices=['gunicorn', 'uvicorn'], default='gunicorn')
+    parser.add_argument('--concurrency', type=lambda v: [int(x) for x in v.split(',')], default=[1, 4, 16])
+    parser.add_argument('--rounds', type=int, default=3, help='uploads per client')
+    parser.add_argument('--payloads', default='jpeg,non_image')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='previous JSON output to compare against')
+    args = parser.parse_args()
+
+    corpus = payloads()
+    env = {
+        'MODEL_DIR': stand_in_model_dir(), 'PRELOAD_MODELS': '', 'PREDICTION_CACHE_ENTRIES': '0',
+        'MAX_UPLOAD_MB': str(2 * len(corpus['jpeg'][1]) / (1024 * 1024))
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    print(f"JPEG payload: {len(corpus['jpeg'][1]) / (1024 * 1024):.1f} MB")
+    header = f"{'payload':<10} {'conc':>5} {'idle':>7} {'peak':>7} {'growth':>7} {'MB/upload':>10}  statuses"
+    print(header)
+    print('-' * len(header))
+    results = {}
+    for name in args.payloads.split(','):
+        filename, data = corpus[name]
+        for concurrency in args.concurrency:
+            r = measure(args, env, filename, data, concurrency)
+            results.setdefault(name, {})[str(concurrency)] = r
+            print(f"{name:<10} {concurrency:>5} {r['idle_rss_mb']:>6.0f}M {r['peak_rss_mb']:>6.0f}M "
+                  f"{r['growth_mb']:>6.0f}M {r['mb_per_upload']:>10.1f}  {r['statuses']}")
+            before = (baseline or {}).get(name, {}).get(str(concurrency))
+            if before:
+                print(f"{'':<16} vs baseline: growth {before['growth_mb']:.0f}M -> {r['growth_mb']:.0f}M, "
+                      f"per upload {before['mb_per_upload']:.1f} -> {r['mb_per_upload']:.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'commit': git_commit(),
+                'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                'config': vars(args),
+                'payload_bytes': {name: len(data) for name, (_, data) in corpus.items()},
+                'results': results
+            }, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
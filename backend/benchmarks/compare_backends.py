@@ -0,0 +1,144 @@
+"""
+Accuracy parity and latency/memory comparison: Keras .h5 vs. TFLite artifacts.
+
+Each backend runs in its own subprocess so import time and resident memory
+are measured in isolation. Predictions on an evaluation set (a folder of
+photos, or synthetic images) are compared against the Keras model.
+
+    python benchmarks/compare_backends.py skin_disease_model \\
+        --tflite models/skin_disease_model.tflite --images ~/eval_photos
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def rss_mb():
+    """Current resident set size of this process"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024.0
+    return None
+
+
+def evaluation_set(images, size, scaling, count):
+    from export_model import load_image_folder
+    from model_registry import scale_inputs
+
+    if images:
+        return load_image_folder(images, size, scaling, count)
+    rng = np.random.default_rng(0)
+    batch = rng.random((count, size[1], size[0], 3), dtype=np.float32)
+    return scale_inputs(batch, scaling)
+
+
+def run_child(args):
+    """Measure one backend and print the results as JSON"""
+    baseline_mb = rss_mb()
+    started = time.perf_counter()
+    from inference_backends import get_backend
+    backend = get_backend(args.child, num_threads=args.threads)
+    network = backend.load(args.path)
+    load_seconds = time.perf_counter() - started
+    loaded_mb = rss_mb()
+
+    _, height, width, _ = network.input_shape
+    inputs = evaluation_set(args.images, (width, height), args.scaling, args.count)
+    predictions = np.concatenate([
+        network.predict_on_batch(inputs[i:i + 32]) for i in range(0, len(inputs), 32)
+    ])
+
+    latency = {}
+    for batch_size in args.batch_sizes:
+        batch = np.resize(inputs, (batch_size,) + inputs.shape[1:])
+        network.predict_on_batch(batch)
+        timings = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            network.predict_on_batch(batch)
+            timings.append((time.perf_counter() - t0) * 1000.0)
+        latency[str(batch_size)] = {
+            'p50_ms': float(np.percentile(timings, 50)),
+            'ms_per_image': float(np.percentile(timings, 50)) / batch_size
+        }
+
+    print(json.dumps({
+        'load_seconds': load_seconds,
+        'rss_mb': loaded_mb,
+        'rss_delta_mb': loaded_mb - baseline_mb,
+        'file_mb': os.path.getsize(args.path) / 1e6,
+        'latency': latency,
+        'predictions': predictions.tolist()
+    }))
+
+
+def measure(backend, path, args, scaling):
+    command = [
+        sys.executable, os.path.abspath(__file__), args.model, '--child', backend, '--path', path,
+        '--scaling', scaling, '--count', str(args.count), '--repeat', str(args.repeat),
+        '--batch-sizes', ','.join(map(str, args.batch_sizes))
+    ]
+    if args.images:
+        command += ['--images', args.images]
+    if args.threads:
+        command += ['--threads', str(args.threads)]
+    proc = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"❌ Measuring {backend}:{path} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('model', nargs='?', default='skin_disease_model')
+    parser.add_argument('--tflite', action='append', help='TFLite artifact(s) to compare (repeatable)')
+    parser.add_argument('--images', help='folder of evaluation photos (default: synthetic)')
+    parser.add_argument('--count', type=int, default=64, help='evaluation images')
+    parser.add_argument('--batch-sizes', type=lambda v: [int(x) for x in v.split(',')], default=[1, 8, 32])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--threads', type=int, help='interpreter threads for TFLite')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    parser.add_argument('--scaling', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(args)
+
+    from app import MODEL_DIR, MODEL_SPECS
+    from inference_backends import TFLiteBackend, artifact_path
+
+    spec = {s.name: s for s in MODEL_SPECS}[args.model]
+    h5_path = spec.path or os.path.join(MODEL_DIR, spec.filename)
+    candidates = [('keras', h5_path)] + [
+        ('tflite', path) for path in (args.tflite or [artifact_path(h5_path, TFLiteBackend)])
+    ]
+
+    results = [(backend, path, measure(backend, path, args, spec.scaling)) for backend, path in candidates]
+    reference = np.array(results[0][2]['predictions'])
+
+    sizes = ' '.join(f"{'b' + str(b) + ' ms/img':>12}" for b in args.batch_sizes)
+    header = f"{'artifact':<34} {'file MB':>8} {'RSS MB':>8} {'+RSS MB':>8} {'load s':>7} {sizes} {'top-1 agree':>12} {'max |dp|':>9}"
+    print(header)
+    print('-' * len(header))
+    for backend, path, result in results:
+        predictions = np.array(result['predictions'])
+        agreement = np.mean(predictions.argmax(axis=1) == reference.argmax(axis=1))
+        max_diff = np.abs(predictions - reference).max()
+        per_image = ' '.join(f"{result['latency'][str(b)]['ms_per_image']:>12.2f}" for b in args.batch_sizes)
+        print(f"{backend + ':' + os.path.basename(path):<34} {result['file_mb']:>8.2f} {result['rss_mb']:>8.0f} "
+              f"{result['rss_delta_mb']:>8.0f} {result['load_seconds']:>7.2f} {per_image} "
+              f"{agreement:>11.1%} {max_diff:>9.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""
+Minimal closed-loop HTTP load generator shared by the serving benchmarks.
+
+Only the standard library is used, so it runs wherever the backend does.
+Each client thread keeps one keep-alive connection and issues requests
+back to back; uploads can be trickled in chunks to mimic slow mobile links.
+"""
+import http.client
+import os
+import socket
+import subprocess
+import threading
+import time
+import uuid
+
+import numpy as np
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def multipart_body(fields=None, files=None):
+    """Encode ``fields`` {name: value} and ``files`` [(field, filename, bytes)] as multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in (fields or {}).items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for field, filename, data in files or []:
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'.encode() + data + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class Request:
+    """One request template: method, path and optional body"""
+
+    def __init__(self, method, path, body=None, content_type=None, headers=None, name=None):
+        self.method = method
+        self.path = path
+        self.body = body
+        self.headers = dict(headers or {})
+        if content_type:
+            self.headers['Content-Type'] = content_type
+        self.name = name or f'{method} {path.split("?")[0]}'
+
+
+def parse_server_timing(value):
+    """{stage: milliseconds} from a ``Server-Timing`` header value"""
+    stages = {}
+    for metric in (value or '').split(','):
+        name, _, params = metric.strip().partition(';')
+        for param in params.split(';'):
+            key, _, duration = param.strip().partition('=')
+            if name and key == 'dur':
+                stages[name] = float(duration)
+    return stages
+
+
+def send(conn, request, upload_kbps=None):
+    """Send ``request`` on ``conn`` and return (status, response body, response headers)"""
+    if request.body is None or not upload_kbps:
+        conn.request(request.method, request.path, body=request.body, headers=request.headers)
+    else:
+        conn.putrequest(request.method, request.path)
+        for key, value in request.headers.items():
+            conn.putheader(key, value)
+        conn.putheader('Content-Length', str(len(request.body)))
+        conn.endheaders()
+        chunk = 4096
+        delay = chunk / (upload_kbps * 1024.0)
+        for offset in range(0, len(request.body), chunk):
+            conn.send(request.body[offset:offset + chunk])
+            time.sleep(delay)
+    response = conn.getresponse()
+    return response.status, response.read(), response.headers
+
+
+def run_load(host, port, requests, concurrency, duration=None, total=None,
+             upload_kbps=None, slow_fraction=0.0, timeout=120):
+    """Drive ``requests`` (cycled) from ``concurrency`` client threads.
+
+    Stops after ``duration`` seconds or ``total`` requests. The first
+    ``slow_fraction`` of the clients trickle their uploads at ``upload_kbps``.
+    Returns {request name: {'latencies': [s...], 'statuses': {code: n},
+    'stages': {stage: [ms...]}}} plus the wall time; stages come from the
+    responses' ``Server-Timing`` headers.
+    """
+    results = {}
+    lock = threading.Lock()
+    issued = [0]
+    deadline = time.perf_counter() + duration if duration else None
+    slow_clients = int(round(concurrency * slow_fraction))
+
+    def next_index():
+        with lock:
+            if total is not None and issued[0] >= total:
+                return None
+            issued[0] += 1
+            return issued[0] - 1
+
+    def client(number):
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        kbps = upload_kbps if number < slow_clients else None
+        local = {}
+        while deadline is None or time.perf_counter() < deadline:
+            index = next_index()
+            if index is None:
+                break
+            request = requests[index % len(requests)]
+            started = time.perf_counter()
+            stages = {}
+            try:
+                status, _, headers = send(conn, request, kbps)
+                stages = parse_server_timing(headers.get('Server-Timing'))
+            except (OSError, http.client.HTTPException):
+                status = 'error'
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=timeout)
+            entry = local.setdefault(request.name, {'latencies': [], 'statuses': {}, 'stages': {}})
+            entry['latencies'].append(time.perf_counter() - started)
+            entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+            for stage, ms in stages.items():
+                entry['stages'].setdefault(stage, []).append(ms)
+        conn.close()
+        with lock:
+            for name, entry in local.items():
+                merged = results.setdefault(name, {'latencies': [], 'statuses': {}, 'stages': {}})
+                merged['latencies'].extend(entry['latencies'])
+                for status, count in entry['statuses'].items():
+                    merged['statuses'][status] = merged['statuses'].get(status, 0) + count
+                for stage, timings in entry['stages'].items():
+                    merged['stages'].setdefault(stage, []).extend(timings)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def summarize(entry, wall_seconds, ok_statuses=(200, 304)):
+    """Latency percentiles (ms), throughput and server stage times for one request type"""
+    latencies = np.array(entry['latencies']) * 1000.0
+    ok = sum(n for status, n in entry['statuses'].items() if status in ok_statuses)
+    stages = {
+        stage: {
+            'mean_ms': float(np.mean(timings)),
+            'p50_ms': float(np.percentile(timings, 50)),
+            'p95_ms': float(np.percentile(timings, 95))
+        }
+        for stage, timings in entry.get('stages', {}).items()
+    }
+    return {
+        'requests': len(latencies),
+        'ok': ok,
+        'statuses': {str(k): v for k, v in sorted(entry['statuses'].items(), key=str)},
+        'requests_per_s': len(latencies) / wall_seconds if wall_seconds else 0.0,
+        'ok_per_s': ok / wall_seconds if wall_seconds else 0.0,
+        'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+        'p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else None,
+        'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+        'stages': stages
+    }
+
+
+def start_server(command, port, env=None, cwd=None, ready_path='/api/health', timeout=180):
+    """Start a server process and wait until ``ready_path`` answers 200"""
+    proc = subprocess.Popen(
+        command, cwd=cwd, env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode}: {' '.join(command)}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', ready_path)
+            if conn.getresponse().status == 200:
+                return proc
+        except OSError:
+            pass
+        time.sleep(0.25)
+    stop_server(proc)
+    raise RuntimeError(f"Server not ready after {timeout}s: {' '.join(command)}")
+
+
+def process_tree_rss_mb(proc):
+    """Resident memory of a server started by start_server plus all of its workers"""
+    total_kb = 0
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                # Fields after the parenthesized command name; pgid is the 3rd
+                pgid = int(f.read().rsplit(')', 1)[1].split()[2])
+            if pgid != proc.pid:
+                continue
+            with open(f'/proc/{pid}/status') as f:
+                total_kb += next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        except (OSError, StopIteration, ValueError, IndexError):
+            continue
+    return total_kb / 1024.0
+
+
+class RSSSampler:
+    """Track the peak resident memory of a server process tree in the background"""
+
+    def __init__(self, proc, interval=0.1):
+        self.proc = proc
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, process_tree_rss_mb(self.proc))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, process_tree_rss_mb(self.proc))
+
+
+def stop_server(proc):
+    """Terminate a server started by start_server, including its workers"""
+    if proc.poll() is None:
+        os.killpg(proc.pid, 15)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, 9)
+            proc.wait()
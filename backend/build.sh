@@ -22,4 +22,11 @@ ls -lh models/
 echo "Installing Python dependencies..."
 pip install -r requirements.txt
 
+# Export the TFLite artifact when serving through the TFLite backend
+if [ "$INFERENCE_BACKEND" = "tflite" ]; then
+    echo "Exporting TFLite model..."
+    pip install ai-edge-litert
+    python export_model.py skin_disease_model --quantize "${TFLITE_QUANTIZE:-none}"
+fi
+
 echo "=== Build Complete ==="
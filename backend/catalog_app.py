@@ -0,0 +1,33 @@
+"""
+Lightweight catalog-only service.
+
+Serves /api/diseases and /api/disease/<name> without the image pipeline or
+any ML framework, so cheap read-only catalog traffic can be scaled
+separately from the inference workers:
+
+    gunicorn catalog_app:app -c gunicorn_catalog.conf.py
+"""
+from flask import Flask, jsonify
+from flask_cors import CORS
+
+from catalog_routes import catalog
+from disease_catalog import DISEASE_DATABASE, MODEL_CLASSES
+
+app = Flask(__name__)
+CORS(app)
+app.register_blueprint(catalog)
+
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return jsonify({
+        'status': 'healthy',
+        'service': 'catalog',
+        'detectable_diseases': len(MODEL_CLASSES),
+        'total_diseases_in_database': len(DISEASE_DATABASE)
+    })
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5002, debug=True)
@@ -0,0 +1,67 @@
+"""
+Read-only disease catalog endpoints, shared by the full API (app.py) and the
+lightweight catalog service (catalog_app.py).
+
+Bodies come pre-serialized from disease_catalog with strong ETags, so repeat
+requests carrying If-None-Match get a 304, and Cache-Control lets browsers
+and CDNs reuse responses for CATALOG_MAX_AGE seconds.
+"""
+import os
+
+from flask import Blueprint, Response, jsonify, request
+
+from disease_catalog import DISEASE_BODIES, disease_list_body, find_disease
+
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', 3600))
+
+catalog = Blueprint('catalog', __name__)
+
+
+def _cached_response(body, etag):
+    """JSON response with ETag/Cache-Control, or 304 if the client has it"""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = CATALOG_MAX_AGE
+    return response.make_conditional(request)
+
+
+def parse_bool(value):
+    if value is None:
+        return None
+    lowered = value.lower()
+    if lowered in ('true', '1', 'yes'):
+        return True
+    if lowered in ('false', '0', 'no'):
+        return False
+    raise ValueError(value)
+
+
+@catalog.route('/api/diseases', methods=['GET'])
+def get_all_diseases():
+    """Get comprehensive list of all diseases in database.
+
+    Optional filters: ?category=, ?severity=, ?contagious=true|false
+    """
+    try:
+        contagious = parse_bool(request.args.get('contagious'))
+    except ValueError:
+        return jsonify({'error': "contagious must be 'true' or 'false'"}), 400
+
+    body, etag = disease_list_body(
+        request.args.get('category'),
+        request.args.get('severity'),
+        contagious
+    )
+    return _cached_response(body, etag)
+
+
+@catalog.route('/api/disease/<name>', methods=['GET'])
+def get_disease_info(name):
+    """Get detailed info about a specific disease"""
+    # Find disease (case-insensitive)
+    disease_name = find_disease(name)
+    if disease_name is None:
+        return jsonify({'error': 'Disease not found'}), 404
+
+    return _cached_response(*DISEASE_BODIES[disease_name])
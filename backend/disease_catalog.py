@@ -0,0 +1,318 @@
+"""
+Skin disease catalog: the classes the models recognize and reference
+information on many more conditions.
+
+This module has no ML dependencies so that the catalog can be served by a
+lightweight process (see catalog_app.py). The database never changes at
+runtime, so it is compiled once at import into lookup indexes and
+pre-serialized JSON bodies with content-hash ETags.
+"""
+import hashlib
+import json
+from functools import lru_cache
+
+# ============================================================================
+# COMPREHENSIVE SKIN DISEASE DATABASE
+# ============================================================================
+# The model recognizes 8 core diseases, but we provide information on many more
+# The predictions will suggest related conditions when appropriate
+
+# Core model classes (8 classes trained model can recognize)
+MODEL_CLASSES = [
+    "Cellulitis",
+    "Impetigo", 
+    "Athlete's Foot",
+    "Nail Fungus",
+    "Ringworm",
+    "Cutaneous Larva Migrans",
+    "Chickenpox",
+    "Shingles"
+]
+
+# Extended disease database for comprehensive information
+DISEASE_DATABASE = {
+    # ========== CORE MODEL DISEASES (Can be detected) ==========
+    "Cellulitis": {
+        "category": "Bacterial Infections",
+        "description": "A serious bacterial skin infection causing redness, swelling, warmth, and pain. Usually affects the lower legs but can occur anywhere. If untreated, it can spread to lymph nodes and bloodstream.",
+        "symptoms": ["Red, swollen skin", "Pain and tenderness", "Warmth in affected area", "Fever and chills", "Skin dimpling"],
+        "causes": ["Bacteria entering through cuts", "Strep or staph bacteria", "Insect bites", "Surgical wounds"],
+        "recommendation": "⚠️ Seek medical attention promptly. Antibiotics are typically required. Keep the affected area elevated and apply cool compresses.",
+        "severity": "moderate-high",
+        "contagious": False,
+        "detectable": True
+    },
+    "Impetigo": {
+        "category": "Bacterial Infections",
+        "description": "A highly contagious bacterial skin infection most common in children. Causes red sores that rupture, ooze, and form a characteristic honey-colored crust.",
+        "symptoms": ["Red sores around nose/mouth", "Honey-colored crusts", "Itching", "Blisters", "Swollen lymph nodes"],
+        "causes": ["Staphylococcus bacteria", "Streptococcus bacteria", "Contact with infected person", "Poor hygiene"],
+        "recommendation": "Consult a doctor for antibiotic treatment (cream or oral). Keep sores clean and covered. Avoid touching and wash hands frequently.",
+        "severity": "mild-moderate",
+        "contagious": True,
+        "detectable": True
+    },
+    "Athlete's Foot": {
+        "category": "Fungal Infections",
+        "description": "A contagious fungal infection (tinea pedis) that typically begins between the toes. Causes scaly, itchy, and sometimes painful rash. Common in people whose feet become sweaty while confined in tight shoes.",
+        "symptoms": ["Scaly, peeling skin", "Itching and burning", "Blisters", "Dry skin on soles", "Raw skin between toes"],
+        "causes": ["Trichophyton fungus", "Warm, moist environments", "Shared showers/pools", "Tight footwear"],
+        "recommendation": "Use over-the-counter antifungal creams, sprays, or powders. Keep feet dry and clean. Wear breathable footwear and change socks regularly.",
+        "severity": "mild",
+        "contagious": True,
+        "detectable": True
+    },
+    "Nail Fungus": {
+        "category": "Fungal Infections",
+        "description": "A fungal infection (onychomycosis) affecting fingernails or toenails. Causes thickening, discoloration (yellow/brown), and crumbling at the edge of the nail. Can be difficult to treat.",
+        "symptoms": ["Thickened nails", "Yellow/brown discoloration", "Brittle, crumbly nails", "Distorted nail shape", "Foul odor"],
+        "causes": ["Dermatophyte fungi", "Warm, moist conditions", "Damaged nails", "Poor circulation"],
+        "recommendation": "See a dermatologist for prescription oral antifungal medication. Treatment takes 6-12 months. Keep nails trimmed short and dry.",
+        "severity": "mild-moderate",
+        "contagious": True,
+        "detectable": True
+    },
+    "Ringworm": {
+        "category": "Fungal Infections",
+        "description": "A contagious fungal infection (tinea corporis) causing a ring-shaped, red, itchy patch on the skin with clearer skin in the center. Despite the name, no worm is involved.",
+        "symptoms": ["Ring-shaped rash", "Red, scaly border", "Itching", "Clear center", "Multiple rings"],
+        "causes": ["Dermatophyte fungi", "Contact with infected person/animal", "Contaminated objects", "Warm, humid conditions"],
+        "recommendation": "Apply antifungal creams (clotrimazole, miconazole) for 2-4 weeks. Keep the area clean and dry. Avoid sharing personal items.",
+        "severity": "mild",
+        "contagious": True,
+        "detectable": True
+    },
+    "Cutaneous Larva Migrans": {
+        "category": "Parasitic Infections",
+        "description": "A parasitic skin infection caused by hookworm larvae penetrating the skin. Creates distinctive winding, snake-like tracks that are intensely itchy. Often acquired from walking barefoot on contaminated sand/soil.",
+        "symptoms": ["Winding red tracks", "Intense itching", "Raised, snake-like lines", "Blisters along tracks"],
+        "causes": ["Hookworm larvae", "Contaminated sand/soil", "Animal feces (dogs/cats)", "Walking barefoot"],
+        "recommendation": "Consult a doctor for antiparasitic medication (ivermectin or albendazole). Avoid scratching to prevent secondary infection. Wear footwear on beaches.",
+        "severity": "moderate",
+        "contagious": False,
+        "detectable": True
+    },
+    "Chickenpox": {
+        "category": "Viral Infections",
+        "description": "A highly contagious viral infection (varicella) causing an itchy, blister-like rash covering the body. Usually mild in children but can be severe in adults and immunocompromised individuals.",
+        "symptoms": ["Itchy blisters", "Fever", "Fatigue", "Loss of appetite", "Headache", "Rash progressing from spots to blisters to crusts"],
+        "causes": ["Varicella-zoster virus", "Airborne transmission", "Direct contact with blisters"],
+        "recommendation": "Rest and stay hydrated. Use calamine lotion and oatmeal baths for itching. Take antihistamines as needed. Consult doctor for antivirals if high-risk.",
+        "severity": "moderate",
+        "contagious": True,
+        "detectable": True
+    },
+    "Shingles": {
+        "category": "Viral Infections",
+        "description": "A painful viral infection (herpes zoster) causing a blistering rash, typically appearing as a stripe on one side of the body. Caused by reactivation of the dormant chickenpox virus, often triggered by stress or weakened immunity.",
+        "symptoms": ["Burning pain", "Tingling/numbness", "Stripe of blisters", "Sensitivity to touch", "Fever", "Fatigue"],
+        "causes": ["Reactivation of varicella-zoster virus", "Weakened immune system", "Aging", "Stress"],
+        "recommendation": "⚠️ Seek medical attention within 72 hours for antiviral medication. Pain management is important. Keep rash clean and covered. Vaccine available for prevention.",
+        "severity": "moderate-high",
+        "contagious": True,
+        "detectable": True
+    },
+    
+    # ========== ADDITIONAL DISEASES (Information provided, related to detected conditions) ==========
+    "Acne": {
+        "category": "Inflammatory Conditions",
+        "description": "A common skin condition where hair follicles become clogged with oil and dead skin cells. Causes pimples, blackheads, whiteheads, and cysts, primarily on the face, chest, and back.",
+        "symptoms": ["Pimples", "Blackheads", "Whiteheads", "Cysts", "Oily skin", "Scarring"],
+        "causes": ["Excess oil production", "Clogged hair follicles", "Bacteria", "Hormonal changes"],
+        "recommendation": "Use gentle cleansers and non-comedogenic products. Try OTC benzoyl peroxide or salicylic acid. See a dermatologist for severe cases.",
+        "severity": "mild-moderate",
+        "contagious": False,
+        "detectable": False,
+        "related_to": ["Impetigo"]
+    },
+    "Eczema": {
+        "category": "Inflammatory Conditions",
+        "description": "A chronic condition (atopic dermatitis) causing dry, itchy, inflamed skin patches. Often appears in childhood and may be associated with allergies and asthma. Symptoms come and go in flares.",
+        "symptoms": ["Dry, scaly skin", "Intense itching", "Red patches", "Thickened skin", "Small raised bumps"],
+        "causes": ["Genetic factors", "Immune dysfunction", "Environmental triggers", "Skin barrier defects"],
+        "recommendation": "Moisturize frequently with fragrance-free products. Identify and avoid triggers. Use topical corticosteroids during flares. See a dermatologist for persistent cases.",
+        "severity": "mild-moderate",
+        "contagious": False,
+        "detectable": False,
+        "related_to": ["Ringworm", "Impetigo"]
+    },
+    "Psoriasis": {
+        "category": "Autoimmune Conditions",
+        "description": "An autoimmune condition that causes rapid skin cell buildup, resulting in thick, red patches with silvery scales. Commonly affects elbows, knees, scalp, and lower back.",
+        "symptoms": ["Red patches with silvery scales", "Dry, cracked skin", "Itching and burning", "Thickened nails", "Stiff joints"],
+        "causes": ["Overactive immune system", "Genetic predisposition", "Triggers (stress, infections, weather)"],
+        "recommendation": "Moisturize regularly. Use medicated creams (corticosteroids, vitamin D). Phototherapy may help. Consult a dermatologist for biologics if severe.",
+        "severity": "moderate",
+        "contagious": False,
+        "detectable": False,
+        "related_to": ["Ringworm", "Eczema"]
+    },
+    "Hives (Urticaria)": {
+        "category": "Allergic Reactions",
+        "description": "Red, itchy, raised welts (wheals) that appear suddenly, often as an allergic reaction. Individual hives typically last less than 24 hours, but new ones can appear.",
+        "symptoms": ["Raised welts", "Intense itching", "Swelling", "Welts that change shape", "Worse with heat"],
+        "causes": ["Allergic reactions", "Foods", "Medications", "Insect stings", "Stress", "Infections"],
+        "recommendation": "Take antihistamines (Benadryl, Zyrtec). Avoid known triggers. Apply cool compresses. Seek emergency care if throat swelling or breathing difficulty.",
+        "severity": "mild-moderate",
+        "contagious": False,
+        "detectable": False,
+        "related_to": ["Chickenpox", "Shingles"]
+    },
+    "Contact Dermatitis": {
+        "category": "Inflammatory Conditions",
+        "description": "Skin inflammation caused by direct contact with irritants (soaps, chemicals) or allergens (nickel, latex, poison ivy). Results in a red, itchy rash in the contact area.",
+        "symptoms": ["Red rash", "Itching", "Blisters", "Dry, cracked skin", "Swelling", "Burning"],
+        "causes": ["Irritants (soaps, solvents)", "Allergens (nickel, latex)", "Plants (poison ivy)", "Fragrances"],
+        "recommendation": "Identify and avoid the trigger. Wash the area thoroughly. Apply corticosteroid cream. Use cool compresses. See a doctor if severe.",
+        "severity": "mild-moderate",
+        "contagious": False,
+        "detectable": False,
+        "related_to": ["Eczema", "Ringworm"]
+    },
+    "Rosacea": {
+        "category": "Inflammatory Conditions",
+        "description": "A chronic skin condition causing facial redness, visible blood vessels, and sometimes small pus-filled bumps. Often mistaken for acne or allergic reaction. More common in fair-skinned adults.",
+        "symptoms": ["Facial redness", "Visible blood vessels", "Small red bumps", "Eye irritation", "Thickened skin on nose"],
+        "causes": ["Unknown (may involve blood vessels, immune system)", "Triggers (sun, stress, alcohol, spicy food)"],
+        "recommendation": "Avoid triggers. Use gentle, fragrance-free skincare. Protect skin from sun. See a dermatologist for prescription treatments (metronidazole, azelaic acid).",
+        "severity": "mild-moderate",
+        "contagious": False,
+        "detectable": False,
+        "related_to": ["Impetigo", "Cellulitis"]
+    },
+    "Warts": {
+        "category": "Viral Infections",
+        "description": "Small, rough growths caused by human papillomavirus (HPV) infection. Very common in children. Can appear anywhere but often on hands and feet. Usually harmless but contagious.",
+        "symptoms": ["Rough, grainy bumps", "Flesh-colored or gray", "Black dots (clotted blood vessels)", "Clusters of growths"],
+        "causes": ["Human papillomavirus (HPV)", "Direct contact", "Shared surfaces", "Scratching/shaving"],
+        "recommendation": "Many warts disappear on their own. Try OTC salicylic acid treatments. See a doctor for freezing (cryotherapy) or other removal methods if persistent.",
+        "severity": "mild",
+        "contagious": True,
+        "detectable": False,
+        "related_to": ["Chickenpox"]
+    },
+    "Skin Cancer": {
+        "category": "Cancer",
+        "description": "Abnormal growth of skin cells, most commonly on sun-exposed areas. Three main types: basal cell carcinoma (most common), squamous cell carcinoma, and melanoma (most dangerous). Early detection is crucial.",
+        "symptoms": ["New or changing moles", "Asymmetric lesions", "Irregular borders", "Multiple colors", "Growing or evolving spots", "Non-healing sores"],
+        "causes": ["UV radiation (sun/tanning beds)", "Fair skin", "History of sunburns", "Many moles", "Family history"],
+        "recommendation": "⚠️ See a dermatologist immediately for any suspicious skin changes. Use ABCDE rule for moles. Protect skin from sun. Get regular skin checks.",
+        "severity": "high",
+        "contagious": False,
+        "detectable": False,
+        "related_to": ["Cellulitis"]
+    },
+    "Jock Itch": {
+        "category": "Fungal Infections",
+        "description": "A fungal infection (tinea cruris) affecting the groin, inner thighs, and buttocks. Causes an itchy, red, ring-shaped rash. More common in athletes and people who sweat heavily.",
+        "symptoms": ["Ring-shaped red rash", "Itching and burning", "Flaking, peeling skin", "Redness in groin folds"],
+        "causes": ["Same fungi as athlete's foot", "Warm, moist conditions", "Tight clothing", "Sweating"],
+        "recommendation": "Keep area clean and dry. Apply antifungal cream (clotrimazole, terbinafine). Wear loose, cotton underwear. Treat athlete's foot to prevent spread.",
+        "severity": "mild",
+        "contagious": True,
+        "detectable": False,
+        "related_to": ["Athlete's Foot", "Ringworm"]
+    },
+    "Scabies": {
+        "category": "Parasitic Infections",
+        "description": "An intensely itchy skin condition caused by tiny burrowing mites. Spreads through close personal contact. Causes a pimple-like rash and intense itching, especially at night.",
+        "symptoms": ["Intense itching (worse at night)", "Pimple-like rash", "Tiny burrow tracks", "Sores from scratching"],
+        "causes": ["Sarcoptes scabiei mite", "Close personal contact", "Shared bedding/clothing"],
+        "recommendation": "⚠️ See a doctor for prescription cream (permethrin). All household members should be treated. Wash all bedding and clothing in hot water.",
+        "severity": "moderate",
+        "contagious": True,
+        "detectable": False,
+        "related_to": ["Cutaneous Larva Migrans"]
+    }
+}
+
+
+# ============================================================================
+# COMPILED INDEXES
+# ============================================================================
+
+def _summary(name, info):
+    return {
+        'name': name,
+        'category': info.get('category', 'Unknown'),
+        'severity': info.get('severity', 'unknown'),
+        'contagious': info.get('contagious', False),
+        'detectable': info.get('detectable', False),
+        'description': info.get('description', '')[:200] + '...'
+    }
+
+
+def serialize(obj):
+    """Serialize like Flask's jsonify; returns (body, etag)"""
+    body = json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
+
+# Case-folded name -> canonical name
+NAME_INDEX = {name.casefold(): name for name in DISEASE_DATABASE}
+
+# List order of /api/diseases: detectable first, then by category and name
+_SUMMARIES = sorted(
+    (_summary(name, info) for name, info in DISEASE_DATABASE.items()),
+    key=lambda d: (not d['detectable'], d['category'], d['name'])
+)
+
+# Case-folded filter value -> set of disease names
+CATEGORY_INDEX = {}
+SEVERITY_INDEX = {}
+CONTAGIOUS_INDEX = {True: set(), False: set()}
+for _entry in _SUMMARIES:
+    CATEGORY_INDEX.setdefault(_entry['category'].casefold(), set()).add(_entry['name'])
+    SEVERITY_INDEX.setdefault(_entry['severity'].casefold(), set()).add(_entry['name'])
+    CONTAGIOUS_INDEX[bool(_entry['contagious'])].add(_entry['name'])
+
+# Detectable class -> non-detectable conditions listing it in related_to
+RELATED_INDEX = {}
+for _name, _info in DISEASE_DATABASE.items():
+    if not _info.get("detectable", False):
+        for _target in _info.get("related_to", []):
+            RELATED_INDEX.setdefault(_target, []).append({
+                "name": _name,
+                "category": _info["category"],
+                "description": _info["description"][:150] + "..."
+            })
+
+# Pre-serialized /api/disease/<name> bodies
+DISEASE_BODIES = {
+    name: serialize({'name': name, **info}) for name, info in DISEASE_DATABASE.items()
+}
+
+
+def find_disease(name):
+    """Canonical disease name for a case-insensitive lookup, or None"""
+    return NAME_INDEX.get(name.casefold())
+
+
+@lru_cache(maxsize=256)
+def disease_list_body(category=None, severity=None, contagious=None):
+    """Serialized /api/diseases body for a filter combination; returns (body, etag).
+
+    Filters are matched case-insensitively; None means no filter.
+    """
+    names = None
+    if category is not None:
+        names = CATEGORY_INDEX.get(category.casefold(), set())
+    if severity is not None:
+        matches = SEVERITY_INDEX.get(severity.casefold(), set())
+        names = matches if names is None else names & matches
+    if contagious is not None:
+        matches = CONTAGIOUS_INDEX[contagious]
+        names = matches if names is None else names & matches
+
+    diseases = _SUMMARIES if names is None else [d for d in _SUMMARIES if d['name'] in names]
+    return serialize({
+        'diseases': diseases,
+        'total': len(diseases),
+        'detectable_count': sum(1 for d in diseases if d['detectable']),
+        'categories': sorted(set(d['category'] for d in diseases))
+    })
+
+
+def get_related_conditions(predicted_class):
+    """Get related conditions that might be similar to the prediction"""
+    return RELATED_INDEX.get(predicted_class, [])[:3]  # Return top 3 related conditions
@@ -0,0 +1,119 @@
+"""
+Export a Keras model from backend/models to a TFLite artifact.
+
+The artifact is written next to the .h5 file with a .tflite extension, which
+is where INFERENCE_BACKEND=tflite looks for it. Inputs and outputs stay
+float32, so the server feeds it exactly what it feeds the Keras model.
+
+    python export_model.py skin_disease_model
+    python export_model.py skin_disease_model --quantize float16
+    python export_model.py skin_disease_model --quantize int8 --calibration-dir ~/calibration
+
+int8 post-training quantization needs a folder of representative photos
+(a few hundred is plenty) to calibrate activation ranges.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from inference_backends import KerasBackend, TFLiteBackend, artifact_path
+from model_registry import scale_inputs
+from preprocessing import preprocess_image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+
+
+def iter_image_folder(directory, limit=None):
+    """Yield paths of image files under ``directory``, sorted, up to ``limit``"""
+    count = 0
+    for root, _, files in sorted(os.walk(directory)):
+        for filename in sorted(files):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(root, filename)
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+
+
+def load_image_folder(directory, size, scaling, limit=None):
+    """Preprocess images under ``directory`` into one scaled (N, H, W, 3) batch"""
+    arrays = []
+    for path in iter_image_folder(directory, limit):
+        with open(path, 'rb') as f:
+            arrays.append(preprocess_image(f, size))
+    if not arrays:
+        raise ValueError(f"No images found in {directory}")
+    return scale_inputs(np.concatenate(arrays), scaling)
+
+
+def convert(network, quantize='none', calibration=None):
+    """Convert a Keras model to TFLite flatbuffer bytes"""
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(network)
+    if quantize == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == 'int8':
+        if calibration is None:
+            raise ValueError("int8 quantization needs --calibration-dir")
+
+        def representative_dataset():
+            for sample in calibration:
+                yield [sample[np.newaxis].astype(np.float32)]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        # Integer kernels where possible, float fallback for the rest;
+        # inputs and outputs stay float32
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+            tf.lite.OpsSet.TFLITE_BUILTINS
+        ]
+    elif quantize != 'none':
+        raise ValueError(f"Unknown quantization '{quantize}'")
+    return converter.convert()
+
+
+def main():
+    from app import MODEL_DIR, MODEL_SPECS
+
+    specs = {spec.name: spec for spec in MODEL_SPECS}
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('model', nargs='?', default='skin_disease_model', choices=sorted(specs))
+    parser.add_argument('--quantize', choices=['none', 'float16', 'int8'], default='none')
+    parser.add_argument('--calibration-dir', help='representative images for int8 calibration')
+    parser.add_argument('--calibration-samples', type=int, default=300)
+    parser.add_argument('--output', help='artifact path (default: next to the .h5 file)')
+    args = parser.parse_args()
+
+    spec = specs[args.model]
+    h5_path = spec.path or os.path.join(MODEL_DIR, spec.filename)
+    output = args.output or artifact_path(h5_path, TFLiteBackend)
+
+    print(f"Loading {h5_path}...")
+    network = KerasBackend().load(h5_path)
+    _, height, width, _ = network.input_shape
+    size = spec.input_size or (width, height)
+
+    calibration = None
+    if args.calibration_dir:
+        calibration = load_image_folder(args.calibration_dir, size, spec.scaling, args.calibration_samples)
+        print(f"Calibrating with {len(calibration)} images from {args.calibration_dir}")
+
+    try:
+        flatbuffer = convert(network, args.quantize, calibration)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    with open(output, 'wb') as f:
+        f.write(flatbuffer)
+
+    h5_mb = os.path.getsize(h5_path) / 1e6
+    print(f"✅ Wrote {output} ({args.quantize}): {len(flatbuffer) / 1e6:.2f} MB (Keras .h5: {h5_mb:.2f} MB)")
+    print(f"   Check parity with: python benchmarks/compare_backends.py {args.model} --tflite {output}")
+
+
+if __name__ == '__main__':
+    main()
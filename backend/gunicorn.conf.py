@@ -0,0 +1,64 @@
+"""
+Gunicorn configuration, loaded automatically from the backend directory.
+
+The app module (Flask, NumPy, Pillow and the disease database) is imported
+once in the master and shared copy-on-write with the workers; with the Keras
+backend the master imports TensorFlow too, since importing is fork-safe. The
+model itself is loaded and warmed up in each worker before it accepts
+requests: TensorFlow's runtime cannot be used across fork().
+
+Workers write Prometheus metrics to files under PROMETHEUS_MULTIPROC_DIR
+(a fresh temporary directory unless set, removed again when gunicorn
+exits), so /metrics reports all workers.
+"""
+import gc
+import glob
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+# Threads let concurrent requests share micro-batches within a worker
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+# Model load + warm-up happens before a worker answers its first request
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = True
+
+# Must be set before the app (and prometheus_client) is imported
+_metrics_tempdir = None
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    _metrics_tempdir = tempfile.mkdtemp(prefix='skin-api-metrics-')
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = _metrics_tempdir
+
+
+def on_starting(server):
+    # Counters from a previous run would otherwise be summed into this one
+    for path in glob.glob(os.path.join(os.environ['PROMETHEUS_MULTIPROC_DIR'], '*.db')):
+        os.remove(path)
+    # app.py only imports TensorFlow when a model is loaded; import it here
+    # so the workers share the master's copy of the modules
+    if os.environ.get('INFERENCE_BACKEND', 'keras') == 'keras':
+        import tensorflow  # noqa: F401
+
+
+def pre_fork(server, worker):
+    # Move preloaded objects out of the GC's reach so collections in the
+    # workers don't write to (and un-share) the master's pages
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    from app import init_model
+    init_model()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    # Only a directory created above; a configured one is just cleared on start
+    if _metrics_tempdir is not None:
+        shutil.rmtree(_metrics_tempdir, ignore_errors=True)
@@ -0,0 +1,11 @@
+"""
+Gunicorn configuration for the catalog-only service (catalog_app.py).
+
+Workers hold no model, so they are cheap: scale them with WEB_CONCURRENCY.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5002')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
@@ -0,0 +1,127 @@
+"""
+Pluggable inference backends.
+
+A backend knows which model file extension it serves and how to load a file
+into a network exposing ``input_shape`` and ``predict_on_batch(batch)``,
+which is all the model registry needs.
+
+- ``keras``: the original .h5 files through tf.keras.
+- ``tflite``: .tflite artifacts produced by export_model.py, served by the
+  LiteRT / tflite_runtime interpreter (falling back to tf.lite). The
+  flatbuffer is memory-mapped, so workers on one host share the weights
+  through the page cache.
+"""
+import os
+import threading
+
+import numpy as np
+
+
+def _import_interpreter():
+    """The lightest available TFLite interpreter class"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+class TFLiteModel:
+    """TFLite interpreters behind the Keras ``predict_on_batch`` interface.
+
+    Resizing an interpreter's input re-allocates all of its tensors, which
+    would happen on nearly every call with micro-batches of varying size.
+    Instead batches are zero-padded to the next power of two and each padded
+    size gets its own interpreter; all of them map the same model file.
+    """
+
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        self.num_threads = num_threads
+        self._Interpreter = _import_interpreter()
+        self._interpreters = {}
+        self._lock = threading.Lock()
+        probe = self._Interpreter(model_path=path)
+        self._input_details = probe.get_input_details()[0]
+
+    @property
+    def input_shape(self):
+        _, height, width, channels = self._input_details['shape']
+        return (None, int(height), int(width), int(channels))
+
+    def _interpreter(self, batch_size):
+        """Interpreter (and its lock) allocated for ``batch_size`` inputs"""
+        with self._lock:
+            entry = self._interpreters.get(batch_size)
+            if entry is None:
+                interpreter = self._Interpreter(model_path=self.path, num_threads=self.num_threads)
+                input_index = interpreter.get_input_details()[0]['index']
+                interpreter.resize_tensor_input(input_index, [batch_size] + list(self.input_shape[1:]))
+                interpreter.allocate_tensors()
+                # An interpreter must not be invoked from two threads at once
+                entry = (interpreter, threading.Lock())
+                self._interpreters[batch_size] = entry
+            return entry
+
+    def predict_on_batch(self, img_batch):
+        img_batch = np.asarray(img_batch, dtype=np.float32)
+        count = len(img_batch)
+        padded_size = 1 << (count - 1).bit_length()
+        if padded_size != count:
+            padding = np.zeros((padded_size - count,) + img_batch.shape[1:], dtype=np.float32)
+            img_batch = np.concatenate([img_batch, padding])
+
+        interpreter, lock = self._interpreter(padded_size)
+        with lock:
+            interpreter.set_tensor(interpreter.get_input_details()[0]['index'], np.ascontiguousarray(img_batch))
+            interpreter.invoke()
+            outputs = interpreter.get_tensor(interpreter.get_output_details()[0]['index'])
+            return outputs[:count].copy()
+
+
+class KerasBackend:
+    """Serve .h5 models through tf.keras"""
+
+    name = 'keras'
+    extension = '.h5'
+
+    def load(self, path):
+        # Imported here so that processes which never load a Keras model
+        # (catalog service, TFLite backend) don't pay for TensorFlow
+        import tensorflow as tf
+        tf.get_logger().setLevel('ERROR')
+        return tf.keras.models.load_model(path, compile=False)
+
+
+class TFLiteBackend:
+    """Serve exported .tflite models through a TFLite interpreter"""
+
+    name = 'tflite'
+    extension = '.tflite'
+
+    def __init__(self, num_threads=None):
+        self.num_threads = num_threads
+
+    def load(self, path):
+        return TFLiteModel(path, num_threads=self.num_threads)
+
+
+def get_backend(name, num_threads=None):
+    """Backend by name ('keras' or 'tflite')"""
+    if name == 'keras':
+        return KerasBackend()
+    if name == 'tflite':
+        return TFLiteBackend(num_threads=num_threads)
+    raise ValueError(f"Unknown inference backend '{name}'. Use 'keras' or 'tflite'.")
+
+
+def artifact_path(path, backend):
+    """Path of the file ``backend`` serves for the model stored at ``path``"""
+    return os.path.splitext(path)[0] + backend.extension
@@ -0,0 +1,238 @@
+"""
+Persistent prediction job queue on local disk.
+
+Jobs live in a SQLite database (WAL mode, shared by web and inference worker
+processes on one host) and their uploads in files next to it, so queued work
+survives restarts. Web processes enqueue and read status; job_worker.py
+processes claim queued jobs in batches and store results.
+
+A job is ``queued`` -> ``running`` -> ``done`` or ``failed``. Jobs whose
+worker died are re-queued by ``recover()``, up to ``max_attempts`` times. A
+worker counts as dead when its pid is gone on this host, or when the pool
+(instance) that started it stopped sending heartbeats, which also covers a
+container restarted under a new hostname.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Job:
+    """A claimed job, as handed to a worker"""
+
+    def __init__(self, job_id, model, options, upload_path):
+        self.id = job_id
+        self.model = model
+        self.options = options
+        self.upload_path = upload_path
+
+
+def worker_id():
+    """Identifies this process in the ``worker`` column (host:pid)"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """SQLite-backed job queue with uploads stored as files under ``directory``"""
+
+    def __init__(self, directory, max_attempts=3):
+        self.directory = directory
+        self.upload_dir = os.path.join(directory, 'uploads')
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self.path = os.path.join(directory, 'jobs.sqlite3')
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL, model TEXT NOT NULL,"
+                " options TEXT NOT NULL, result TEXT, error TEXT, worker TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " created REAL NOT NULL, started REAL, finished REAL, instance TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created)")
+            conn.execute("CREATE TABLE IF NOT EXISTS instances (id TEXT PRIMARY KEY, seen REAL NOT NULL)")
+            # Queues created before instances were recorded
+            if 'instance' not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN instance TEXT")
+
+    def _connect(self):
+        # One connection per thread and per process, as in prediction_cache
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def new_id(self):
+        return uuid.uuid4().hex
+
+    def upload_path(self, job_id):
+        return os.path.join(self.upload_dir, job_id)
+
+    def enqueue(self, job_id, model, options=None):
+        """Queue a job whose upload has already been written to ``upload_path(job_id)``"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, model, options, created) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, model, json.dumps(options or {}), time.time())
+            )
+        return job_id
+
+    def heartbeat(self, instance):
+        """Record that the worker pool ``instance`` is alive"""
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO instances (id, seen) VALUES (?, ?)", (instance, time.time()))
+
+    def claim(self, limit, worker=None, instance=None):
+        """Mark up to ``limit`` of the oldest queued jobs as running and return them"""
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers can't
+        # select the same rows
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, model, options FROM jobs WHERE status = ? ORDER BY created LIMIT ?",
+                (QUEUED, limit)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE jobs SET status = ?, worker = ?, instance = ?, started = ?, attempts = attempts + 1"
+                    " WHERE id = ?",
+                    [(RUNNING, worker or worker_id(), instance, time.time(), job_id) for job_id, _, _ in rows]
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [Job(job_id, model, json.loads(options), self.upload_path(job_id)) for job_id, model, options in rows]
+
+    def complete(self, job_id, result):
+        self._finish(job_id, DONE, result=json.dumps(result))
+
+    def fail(self, job_id, error):
+        self._finish(job_id, FAILED, error=str(error))
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? WHERE id = ?",
+                (status, result, error, time.time(), job_id)
+            )
+        self._remove_upload(job_id)
+
+    def _remove_upload(self, job_id):
+        try:
+            os.remove(self.upload_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def get(self, job_id):
+        """Job status (with result or error once finished), or None"""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT status, model, options, result, error, attempts, created, started, finished"
+            " FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, model, options, result, error, attempts, created, started, finished = row
+        job = {
+            'job_id': job_id,
+            'status': status,
+            'model': model,
+            'options': json.loads(options),
+            'attempts': attempts,
+            'created': created,
+            'started': started,
+            'finished': finished
+        }
+        if status == QUEUED:
+            job['queue_position'] = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created < ?", (QUEUED, created)
+            ).fetchone()[0]
+        if status == DONE:
+            job['result'] = json.loads(result)
+        if status == FAILED:
+            job['error'] = error
+        return job
+
+    def recover(self, stale_seconds=None, instance_timeout=None):
+        """Re-queue jobs left running by a dead worker (or running longer than ``stale_seconds``).
+
+        Workers of a pool whose last heartbeat is older than
+        ``instance_timeout`` seconds count as dead, wherever they ran.
+
+        Jobs that already used up ``max_attempts`` fail instead, so an image
+        that crashes the worker can't take the pool down forever.
+        """
+        host = socket.gethostname()
+        now = time.time()
+        orphans = []
+        conn = self._connect()
+        seen = dict(conn.execute("SELECT id, seen FROM instances").fetchall())
+        for job_id, worker, instance, attempts, started in conn.execute(
+            "SELECT id, worker, instance, attempts, started FROM jobs WHERE status = ?", (RUNNING,)
+        ).fetchall():
+            worker_host, _, pid = (worker or '').rpartition(':')
+            dead = worker_host == host and pid.isdigit() and not _pid_alive(int(pid))
+            lost = (instance_timeout is not None and instance is not None
+                    and now - seen.get(instance, 0.0) > instance_timeout)
+            stale = stale_seconds is not None and started is not None and now - started > stale_seconds
+            if dead or lost or stale:
+                orphans.append((job_id, attempts))
+        failed = []
+        with conn:
+            for job_id, attempts in orphans:
+                if attempts >= self.max_attempts:
+                    failed.append(job_id)
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ? AND status = ?",
+                        (FAILED, f'Worker stopped while processing the job ({attempts} attempts)', now,
+                         job_id, RUNNING)
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, worker = NULL, instance = NULL, started = NULL"
+                        " WHERE id = ? AND status = ?",
+                        (QUEUED, job_id, RUNNING)
+                    )
+        for job_id in failed:
+            self._remove_upload(job_id)
+        return len(orphans)
+
+    def prune(self, max_age_seconds):
+        """Delete finished jobs (and pool heartbeats) older than ``max_age_seconds``"""
+        cutoff = time.time() - max_age_seconds
+        with self._connect() as conn:
+            conn.execute("DELETE FROM instances WHERE seen < ?", (cutoff,))
+            return conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished < ?", (DONE, FAILED, cutoff)
+            ).rowcount
+
+    def stats(self):
+        """Job counts per status"""
+        counts = dict(self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)}
@@ -0,0 +1,96 @@
+"""
+Asynchronous prediction job endpoints, registered on the Flask API (app.py);
+asgi_app.py serves the same endpoints with the helpers below.
+
+POST /api/jobs stores the upload in the persistent job queue and returns a
+job id straight away; the inference worker pool (job_worker.py) runs it and
+GET /api/jobs/<id> reports its status and, once done, the same result body
+/api/predict returns.
+"""
+import os
+from functools import lru_cache
+
+from flask import Blueprint, jsonify, request, url_for
+
+import metrics
+from job_queue import JobQueue
+from uploads import UnsupportedImage, check_image
+
+JOBS_DIR = os.environ.get('JOBS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+
+jobs = Blueprint('jobs', __name__)
+
+
+@lru_cache(maxsize=None)
+def get_job_queue():
+    """The job queue under JOBS_DIR (created on first use)"""
+    return JobQueue(JOBS_DIR, max_attempts=JOB_MAX_ATTEMPTS)
+
+
+def parse_job_request(get):
+    """Validated ``(selection, options)`` of a job request; raises ValueError.
+
+    ``get`` looks up a request parameter by name. Model names and tiling
+    options are checked here so that bad requests fail immediately rather
+    than in the worker.
+    """
+    # Imported here: app.py registers this blueprint at import time
+    from app import parse_tiling, registry
+
+    selection = get('model') or registry.default
+    members = registry.members(selection)
+    tiling = parse_tiling(get)
+    if tiling and members != [selection]:
+        raise ValueError('Tiled predictions support single models only')
+    return selection, {'tiling': list(tiling)} if tiling else {}
+
+
+def enqueue_job(save_upload, selection, options):
+    """Write the upload with ``save_upload(path)``, then queue the job; returns its id"""
+    queue = get_job_queue()
+    job_id = queue.new_id()
+    save_upload(queue.upload_path(job_id))
+    return queue.enqueue(job_id, selection, options)
+
+
+@jobs.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue an image for prediction and return its job id right away"""
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        metrics.observe_error('jobs', 'MissingFile')
+        return jsonify({'error': 'No file uploaded' if file is None else 'No file selected'}), 400
+
+    try:
+        selection, options = parse_job_request(lambda name: request.form.get(name) or request.args.get(name))
+    except ValueError as e:
+        metrics.observe_error('jobs', e)
+        return jsonify({'error': str(e)}), 400
+    try:
+        check_image(file.stream)
+    except UnsupportedImage as e:
+        metrics.observe_error('jobs', e)
+        return jsonify({'error': str(e)}), 415
+
+    # Streams the spooled upload to disk in chunks
+    job_id = enqueue_job(file.save, selection, options)
+    status_url = url_for('jobs.get_job', job_id=job_id)
+    response = jsonify({'job_id': job_id, 'status': 'queued', 'status_url': status_url})
+    response.headers['Location'] = status_url
+    return response, 202
+
+
+@jobs.route('/api/jobs', methods=['GET'])
+def get_job_stats():
+    """Number of jobs per status"""
+    return jsonify(get_job_queue().stats())
+
+
+@jobs.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a job, with its prediction once done or its error if it failed"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
@@ -0,0 +1,208 @@
+"""
+Inference worker pool for /api/jobs.
+
+Each worker process loads and warms up the model once, then claims up to
+JOB_BATCH_SIZE queued jobs at a time. Plain single-model jobs are decoded
+straight into one batch buffer and run through the model in one call;
+ensemble, cascade and tiled jobs go through the same path as /api/predict.
+Results are stored in the job queue in the /api/predict response shape.
+
+The supervising process restarts workers that die and re-queues the jobs
+they were running, so inference capacity scales independently of the web
+workers. Workers that can't load the model are restarted with exponential
+backoff, and the pool gives up after JOB_MAX_STARTUP_FAILURES in a row:
+
+    python job_worker.py --workers 2
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+from job_queue import worker_id
+from job_routes import JOBS_DIR, get_job_queue
+from uploads import Upload
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 1))
+JOB_BATCH_SIZE = int(os.environ.get('JOB_BATCH_SIZE', 16))
+# Idle workers check for new jobs this often
+JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', 0.5))
+# Running jobs older than this are assumed lost and re-queued
+JOB_STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', 600))
+# Finished jobs (and their results) are kept this long
+JOB_RETENTION_HOURS = float(os.environ.get('JOB_RETENTION_HOURS', 24))
+# Consecutive model load failures before the pool stops
+JOB_MAX_STARTUP_FAILURES = int(os.environ.get('JOB_MAX_STARTUP_FAILURES', 5))
+
+SUPERVISOR_INTERVAL = 5.0
+PRUNE_INTERVAL = 600.0
+# Jobs of a pool that missed this many heartbeats are re-queued
+INSTANCE_TIMEOUT = 6 * SUPERVISOR_INTERVAL
+RESTART_BACKOFF_MAX = 300.0
+# Exit code of a worker that could not load the model
+EXIT_STARTUP_FAILED = 3
+
+
+def predict_group(api, model, jobs):
+    """Decode a group of plain jobs for one model into a batch and predict it in one call"""
+    import preprocessing
+
+    loaded = api.registry.get(model)
+    batch = preprocessing.new_batch_buffer(len(jobs), loaded.input_size)
+    decoded = []
+    for job in jobs:
+        try:
+            with open(job.upload_path, 'rb') as f:
+                preprocessing.preprocess_into(batch[len(decoded)], f, loaded.input_size)
+            decoded.append(job)
+        except Exception as e:
+            yield job, e
+
+    if not decoded:
+        return
+    try:
+        predictions = loaded.predict_batch(batch[:len(decoded)])
+    except Exception as e:
+        for job in decoded:
+            yield job, e
+        return
+    for job, probabilities in zip(decoded, predictions):
+        yield job, {
+            'success': True,
+            **api.build_prediction_result(probabilities, loaded.classes),
+            'model': {'name': loaded.name}
+        }
+
+
+def predict_one(api, job, tiling):
+    """Run one job through the /api/predict path (ensemble, cascade, tiles, cache)"""
+    with open(job.upload_path, 'rb') as f:
+        upload = Upload(f)
+        image = api.decode_upload(upload, job.model, tiling=tiling)
+        probabilities, classes, model_info, tiles = api.run_prediction(job.model, upload, image, tiling)
+    result = api.build_prediction_result(probabilities, classes)
+    if tiles is not None:
+        result['tiles'] = tiles
+    return {'success': True, **result, 'model': model_info}
+
+
+def run_jobs(api, jobs):
+    """Yield ``(job, result body or exception)`` for a batch of claimed jobs"""
+    plain = defaultdict(list)
+    for job in jobs:
+        tiling = tuple(job.options['tiling']) if job.options.get('tiling') else None
+        try:
+            if tiling is None and api.registry.members(job.model) == [job.model]:
+                plain[job.model].append(job)
+                continue
+            outcome = predict_one(api, job, tiling)
+        except Exception as e:
+            outcome = e
+        yield job, outcome
+
+    for model, group in plain.items():
+        yield from predict_group(api, model, group)
+
+
+def worker_main(instance, ready):
+    """Load the model once, then claim and run job batches until SIGTERM"""
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    import app as api
+
+    api.init_model()
+    if api.model_state['status'] != 'ready':
+        print(f"❌ Worker {os.getpid()} could not load the model: {api.model_state['error']}")
+        sys.exit(EXIT_STARTUP_FAILED)
+    ready.set()
+
+    queue = get_job_queue()
+    name = worker_id()
+    print(f"👷 Job worker {name} ready (batches of up to {JOB_BATCH_SIZE})")
+    while not stopping:
+        jobs = queue.claim(JOB_BATCH_SIZE, name, instance)
+        if not jobs:
+            time.sleep(JOB_POLL_SECONDS)
+            continue
+        for job, outcome in run_jobs(api, jobs):
+            if isinstance(outcome, Exception):
+                queue.fail(job.id, outcome)
+            else:
+                queue.complete(job.id, outcome)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=JOB_WORKERS, help='inference worker processes')
+    args = parser.parse_args()
+
+    queue = get_job_queue()
+    # Identifies this pool's claims; jobs of pools that stop sending
+    # heartbeats (e.g. a container restarted under a new hostname) are re-queued
+    instance = uuid.uuid4().hex
+    queue.heartbeat(instance)
+    recovered = queue.recover(JOB_STALE_SECONDS, INSTANCE_TIMEOUT)
+    print(f"🗂️  Job queue: {JOBS_DIR} {queue.stats()} ({recovered} re-queued)")
+
+    # Spawned, not forked: each worker starts its own TensorFlow runtime
+    context = multiprocessing.get_context('spawn')
+    ready = context.Event()
+    workers = []
+    stopping = []
+
+    def stop(*_):
+        stopping.append(True)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    failures = 0
+    next_start = 0.0
+    last_prune = 0.0
+    while not stopping:
+        queue.heartbeat(instance)
+        if ready.is_set():
+            failures = 0
+        for worker in [w for w in workers if not w.is_alive()]:
+            workers.remove(worker)
+            if worker.exitcode == EXIT_STARTUP_FAILED:
+                failures += 1
+                backoff = min(SUPERVISOR_INTERVAL * 2 ** (failures - 1), RESTART_BACKOFF_MAX)
+                next_start = time.time() + backoff
+                print(f"⚠️  Job worker failed to start ({failures} in a row), retrying in {backoff:g}s")
+        if failures >= JOB_MAX_STARTUP_FAILURES and not workers:
+            print(f"❌ Giving up: job workers failed to load the model {failures} times in a row")
+            break
+
+        # A dead worker's running jobs go back to the queue
+        queue.recover(JOB_STALE_SECONDS, INSTANCE_TIMEOUT)
+        if len(workers) < args.workers and time.time() >= next_start:
+            ready.clear()
+            for _ in range(args.workers - len(workers)):
+                worker = context.Process(target=worker_main, args=(instance, ready), name='job-worker')
+                worker.start()
+                workers.append(worker)
+        if time.time() - last_prune > PRUNE_INTERVAL:
+            queue.prune(JOB_RETENTION_HOURS * 3600)
+            last_prune = time.time()
+        time.sleep(SUPERVISOR_INTERVAL)
+
+    print("🛑 Stopping job workers (running batches finish first)")
+    for worker in workers:
+        worker.terminate()
+    for worker in workers:
+        worker.join(timeout=60)
+        if worker.is_alive():
+            worker.kill()
+    if failures >= JOB_MAX_STARTUP_FAILURES and not workers:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Prometheus metrics for the inference API, served on /metrics.
+
+- request latency per endpoint and status, and per stage of /api/predict
+  (read, decode, preprocess, inference, json) from the request's StageTimer;
+- predictions per model and class, errors per endpoint and error type;
+- upload size and decoded image dimensions;
+- resident memory per worker and RSS growth per loaded model.
+
+Recording a request costs a handful of in-memory increments, so metrics are
+always on. Under several gunicorn workers, PROMETHEUS_MULTIPROC_DIR (set by
+gunicorn.conf.py) makes every worker write to shared files and /metrics
+reports the sum over workers, whichever worker answers the scrape.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 16 KB .. 64 MB
+BYTES_BUCKETS = tuple(2 ** p for p in range(14, 27, 2))
+# Thumbnail, web, phone and camera sizes
+SIDE_BUCKETS = (150, 300, 640, 1024, 1600, 2400, 3200, 4096, 6000, 8192)
+MEGAPIXEL_BUCKETS = (0.1, 0.5, 1, 2, 4, 8, 12, 16, 24, 50)
+
+REQUEST_SECONDS = Histogram(
+    'skin_api_request_seconds', 'HTTP request latency', ['endpoint', 'method', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+STAGE_SECONDS = Histogram(
+    'skin_api_stage_seconds', 'Time per /api/predict stage', ['stage'], buckets=LATENCY_BUCKETS
+)
+PREDICTIONS = Counter('skin_api_predictions_total', 'Predictions by top-1 class', ['model', 'class'])
+ERRORS = Counter('skin_api_errors_total', 'Failed requests by error type', ['endpoint', 'error'])
+UPLOAD_BYTES = Histogram('skin_api_upload_bytes', 'Upload size', buckets=BYTES_BUCKETS)
+IMAGE_SIDE_PIXELS = Histogram(
+    'skin_api_image_side_pixels', 'Decoded image width and height', ['side'], buckets=SIDE_BUCKETS
+)
+IMAGE_MEGAPIXELS = Histogram('skin_api_image_megapixels', 'Decoded image size', buckets=MEGAPIXEL_BUCKETS)
+WORKER_RSS_BYTES = Gauge(
+    'skin_api_worker_resident_memory_bytes', 'Resident memory of the worker', multiprocess_mode='liveall'
+)
+MODEL_MEMORY_BYTES = Gauge(
+    'skin_api_model_memory_bytes', 'Resident memory added by loading the model', ['model'],
+    multiprocess_mode='livemax'
+)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+# Memory gauges are refreshed at most this often on the request path
+MEMORY_REFRESH_SECONDS = 1.0
+_memory_refreshed_at = 0.0
+
+
+def rss_bytes():
+    """Current resident set size of this process (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def observe_stages(timer):
+    for stage, seconds in timer.stages.items():
+        STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+def observe_upload(size_bytes, image=None):
+    """Upload size, and dimensions if the image was decoded"""
+    UPLOAD_BYTES.observe(size_bytes)
+    size = getattr(image, 'original_size', None)
+    if size is not None:
+        width, height = size
+        IMAGE_SIDE_PIXELS.labels('width').observe(width)
+        IMAGE_SIDE_PIXELS.labels('height').observe(height)
+        IMAGE_MEGAPIXELS.observe(width * height / 1e6)
+
+
+def observe_prediction(model, predicted_class):
+    PREDICTIONS.labels(model, predicted_class).inc()
+
+
+def observe_error(endpoint, error):
+    """Count an exception (by class name) or an error code string"""
+    ERRORS.labels(endpoint, error if isinstance(error, str) else type(error).__name__).inc()
+
+
+def observe_request(endpoint, method, status, seconds):
+    REQUEST_SECONDS.labels(endpoint, method, str(status)).observe(seconds)
+
+
+def update_memory(registry, force=False):
+    """Refresh this worker's memory gauges (throttled unless ``force``)"""
+    global _memory_refreshed_at
+    now = time.monotonic()
+    if not force and now - _memory_refreshed_at < MEMORY_REFRESH_SECONDS:
+        return
+    _memory_refreshed_at = now
+    rss = rss_bytes()
+    if rss is not None:
+        WORKER_RSS_BYTES.set(rss)
+    for loaded in registry.loaded():
+        if loaded.memory_bytes is not None:
+            MODEL_MEMORY_BYTES.labels(loaded.name).set(loaded.memory_bytes)
+
+
+def render():
+    """(body, content type) of the /metrics response"""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        collector_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collector_registry)
+    else:
+        collector_registry = REGISTRY
+    return generate_latest(collector_registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,297 @@
+"""
+Registry of servable models, loaded lazily on first use.
+
+Each model has its own input size, input scaling and class list, and its own
+micro-batcher. Besides single models, callers can select two combined modes:
+
+- ``ensemble``: average the probabilities of several models that share a
+  class list.
+- ``cascade``: run a cheap model first and escalate to a heavier one only
+  when the cheap model's top-1 confidence is below a threshold.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from batching import MicroBatcher
+from inference_backends import artifact_path
+from metrics import rss_bytes
+
+ENSEMBLE = 'ensemble'
+CASCADE = 'cascade'
+
+# keras.applications.resnet50.preprocess_input ("caffe" mode): BGR, mean-centred
+_CAFFE_MEAN_BGR = np.array([103.939, 116.779, 123.68], dtype=np.float32)
+
+
+def scale_inputs(img_batch, scaling):
+    """Convert a [0, 1] batch to the input range a model was trained on"""
+    if scaling == 'unit':
+        return img_batch
+    scaled = img_batch * np.float32(255.0)
+    if scaling == 'caffe':
+        scaled = scaled[..., ::-1] - _CAFFE_MEAN_BGR
+    return scaled
+
+
+class UnknownModel(ValueError):
+    """Raised when a request selects a model that is not registered"""
+
+
+class ModelSpec:
+    """Static description of a model file and how to feed it.
+
+    ``scaling`` converts the [0, 1] preprocessed tensor to what the network
+    was trained on: ``unit`` leaves it as is, ``raw`` rescales to [0, 255]
+    (EfficientNetV2 has its preprocessing built in), ``caffe`` applies the
+    ResNet50 preprocessing. ``input_size`` is read from the model when None.
+    """
+
+    def __init__(self, name, filename, classes, input_size=None, scaling='unit',
+                 description='', path=None):
+        if scaling not in ('unit', 'raw', 'caffe'):
+            raise ValueError(f"Unknown scaling '{scaling}' for model {name}")
+        self.name = name
+        self.filename = filename
+        self.classes = list(classes)
+        self.input_size = tuple(input_size) if input_size else None
+        self.scaling = scaling
+        self.description = description
+        self.path = path
+
+
+class _LatencyTracker:
+    """Call latencies over a sliding window of recent model calls"""
+
+    def __init__(self, window=1024):
+        self._calls = deque(maxlen=window)
+        self.calls = 0
+        self.images = 0
+        self.seconds = 0.0
+
+    def observe(self, seconds, batch_size):
+        self._calls.append(seconds * 1000.0)
+        self.calls += 1
+        self.images += batch_size
+        self.seconds += seconds
+
+    def as_dict(self):
+        recent = np.array(self._calls) if self._calls else None
+        return {
+            'calls': self.calls,
+            'images': self.images,
+            'ms_per_image': round(self.seconds * 1000.0 / self.images, 3) if self.images else None,
+            'call_ms_p50': round(float(np.percentile(recent, 50)), 3) if recent is not None else None,
+            'call_ms_p95': round(float(np.percentile(recent, 95)), 3) if recent is not None else None
+        }
+
+
+class LoadedModel:
+    """A loaded network plus its micro-batcher and latency statistics"""
+
+    def __init__(self, spec, network, path, load_seconds, batch_options, memory_bytes=None):
+        self.spec = spec
+        self.network = network
+        self.path = path
+        self.load_seconds = load_seconds
+        self.memory_bytes = memory_bytes
+        if spec.input_size:
+            self.input_size = spec.input_size
+        else:
+            _, height, width, _ = network.input_shape
+            self.input_size = (width, height)
+        self.latency = _LatencyTracker()
+        self.batcher = MicroBatcher(self.predict_batch, name=spec.name, **batch_options)
+
+    @property
+    def name(self):
+        return self.spec.name
+
+    @property
+    def classes(self):
+        return self.spec.classes
+
+    def predict_batch(self, img_batch):
+        """Run a preprocessed [0, 1] (N, H, W, 3) batch through the network"""
+        started = time.perf_counter()
+        outputs = self.network.predict_on_batch(scale_inputs(img_batch, self.spec.scaling))
+        self.latency.observe(time.perf_counter() - started, len(img_batch))
+        return outputs
+
+    def predict(self, img):
+        """Predict one (H, W, 3) image, batched with concurrent requests"""
+        return self.batcher.predict(img)
+
+    def warm_up(self, batch_sizes):
+        """Trace the network for each batch size before real traffic arrives"""
+        width, height = self.input_size
+        for batch_size in sorted(set(batch_sizes)):
+            self.network.predict_on_batch(np.zeros((batch_size, height, width, 3), dtype=np.float32))
+
+    def stats(self):
+        return {
+            'loaded': True,
+            'input_size': list(self.input_size),
+            'load_seconds': round(self.load_seconds, 3),
+            'memory_mb': round(self.memory_bytes / 2 ** 20, 1) if self.memory_bytes is not None else None,
+            'latency': self.latency.as_dict(),
+            'batching': self.batcher.stats()
+        }
+
+
+class ModelRegistry:
+    """Lazily loads registered models and runs single, ensemble or cascade predictions.
+
+    ``backend`` (see inference_backends) decides which file is served for a
+    spec and loads it into a network exposing ``predict_on_batch`` and
+    ``input_shape``.
+    """
+
+    def __init__(self, specs, model_dir, backend, default, ensemble=(), cascade=(),
+                 cascade_threshold=0.6, batch_options=None):
+        self.specs = {spec.name: spec for spec in specs}
+        self.model_dir = model_dir
+        self.backend = backend
+        self.default = default
+        self.ensemble = list(ensemble)
+        self.cascade = list(cascade)
+        self.cascade_threshold = cascade_threshold
+        self.batch_options = batch_options or {}
+        self._models = {}
+        self._locks = {name: threading.Lock() for name in self.specs}
+        self._cascade_requests = 0
+        self._cascade_escalations = 0
+
+        for name in [default] + self.ensemble + self.cascade:
+            self.spec(name)
+        if self.ensemble and len({tuple(self.specs[n].classes) for n in self.ensemble}) > 1:
+            raise ValueError("Ensemble models must share the same class list")
+
+    @property
+    def selections(self):
+        """Names a request may select"""
+        modes = [mode for mode, members in ((ENSEMBLE, self.ensemble), (CASCADE, self.cascade)) if members]
+        return list(self.specs) + modes
+
+    def spec(self, name):
+        if name not in self.specs:
+            raise UnknownModel(f"Unknown model '{name}'. Available: {', '.join(self.selections)}")
+        return self.specs[name]
+
+    def path(self, name):
+        spec = self.spec(name)
+        return artifact_path(spec.path or os.path.join(self.model_dir, spec.filename), self.backend)
+
+    def members(self, selection):
+        """Models a selection may run, in the order they are tried"""
+        if selection == ENSEMBLE and self.ensemble:
+            return list(self.ensemble)
+        if selection == CASCADE and self.cascade:
+            return list(self.cascade)
+        self.spec(selection)
+        return [selection]
+
+    def upfront_members(self, selection):
+        """Models a selection always runs: a cascade's later stages only run on escalation"""
+        members = self.members(selection)
+        return members[:1] if selection == CASCADE and self.cascade else members
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def get(self, name):
+        """Return the loaded model, loading it on first use"""
+        loaded = self._models.get(name)
+        if loaded is not None:
+            return loaded
+        spec = self.spec(name)
+        with self._locks[name]:
+            if name not in self._models:
+                path = self.path(name)
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"Model not found at {path}. Please download the model first.")
+                started = time.perf_counter()
+                # RSS growth is approximate if other threads allocate meanwhile
+                rss_before = rss_bytes()
+                network = self.backend.load(path)
+                rss_after = rss_bytes()
+                self._models[name] = LoadedModel(
+                    spec, network, path, time.perf_counter() - started, self.batch_options,
+                    memory_bytes=rss_after - rss_before if rss_before is not None else None
+                )
+            return self._models[name]
+
+    def loaded(self):
+        """Models loaded so far in this process"""
+        return list(self._models.values())
+
+    def fingerprint_paths(self):
+        """Model files currently on disk, for cache invalidation"""
+        return [self.path(name) for name in self.specs if os.path.exists(self.path(name))]
+
+    def predict(self, selection, predict_fn):
+        """Run a selection and return ``(probabilities, classes, details)``.
+
+        ``predict_fn(loaded_model)`` returns the probability vector of one
+        model for the current image, so callers control preprocessing and
+        caching.
+        """
+        if selection == ENSEMBLE and self.ensemble:
+            outputs = [predict_fn(self.get(name)) for name in self.ensemble]
+            probabilities = np.mean(outputs, axis=0)
+            return probabilities, self.specs[self.ensemble[0]].classes, {
+                'name': ENSEMBLE,
+                'members': list(self.ensemble)
+            }
+
+        if selection == CASCADE and self.cascade:
+            self._cascade_requests += 1
+            for stage, name in enumerate(self.cascade):
+                loaded = self.get(name)
+                probabilities = predict_fn(loaded)
+                confident = float(np.max(probabilities)) >= self.cascade_threshold
+                if confident or stage == len(self.cascade) - 1:
+                    break
+            if stage > 0:
+                self._cascade_escalations += 1
+            return probabilities, loaded.classes, {
+                'name': CASCADE,
+                'answered_by': loaded.name,
+                'escalated': stage > 0,
+                'threshold': self.cascade_threshold
+            }
+
+        loaded = self.get(selection)
+        return predict_fn(loaded), loaded.classes, {'name': loaded.name}
+
+    def stats(self):
+        """Per-model load state and latency, plus the cascade escalation rate"""
+        models = {}
+        for name, spec in self.specs.items():
+            loaded = self._models.get(name)
+            entry = loaded.stats() if loaded is not None else {'loaded': False}
+            entry.update(
+                file=os.path.basename(self.path(name)),
+                classes=len(spec.classes),
+                description=spec.description,
+                default=name == self.default
+            )
+            models[name] = entry
+        return {
+            'backend': self.backend.name,
+            'default': self.default,
+            'selections': self.selections,
+            'models': models,
+            'ensemble': {'members': self.ensemble},
+            'cascade': {
+                'members': self.cascade,
+                'threshold': self.cascade_threshold,
+                'requests': self._cascade_requests,
+                'escalations': self._cascade_escalations,
+                'escalation_rate': round(self._cascade_escalations / self._cascade_requests, 4)
+                if self._cascade_requests else 0.0
+            }
+        }
@@ -0,0 +1,233 @@
+"""
+Content-addressed cache of model predictions.
+
+Predictions are cached under two keys: a hash of the raw upload bytes, and an
+exact hash of the preprocessed input tensor. The tensor key only matches
+uploads that decode to identical pixels: the same JPEG with its metadata
+edited or stripped, or the same pixels saved losslessly in another format
+(PNG, TIFF, lossless WebP). A lossy re-save changes the pixels and misses;
+matching it would take a similarity key, which could hand one photo's
+prediction to a different lesion. Entries live in an
+in-memory LRU bounded by entry count and bytes, and optionally in a SQLite
+store shared by all gunicorn workers on the host.
+
+Keys can be namespaced by model name when several models are served. Every
+entry is tagged with a fingerprint of the model files it was computed with;
+loading a different model file invalidates the cache.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Approximate per-entry overhead of the OrderedDict slot, key and array header
+_ENTRY_OVERHEAD = 200
+
+
+def model_fingerprint(*model_paths):
+    """Identify model files by path, size and modification time"""
+    parts = []
+    for model_path in model_paths:
+        stat = os.stat(model_path)
+        parts.append(f"{os.path.basename(model_path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return '|'.join(parts)
+
+
+def _key(kind, digest, model_name):
+    return f"{kind}:{model_name}:{digest}" if model_name else f"{kind}:{digest}"
+
+
+def _upload_hash():
+    return hashlib.blake2b(digest_size=16)
+
+
+def stream_digest(stream, chunk_size=256 * 1024):
+    """Digest of a binary file's contents from its current position, hashed in chunks"""
+    digest = _upload_hash()
+    while chunk := stream.read(chunk_size):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def digest_key(digest, model_name=None):
+    """Cache key for raw upload contents hashed with ``stream_digest``"""
+    return _key('raw', digest, model_name)
+
+
+def tensor_key(img_array, model_name=None):
+    """Cache key for a preprocessed [0, 1] tensor, hashed exactly at 8-bit precision"""
+    pixels = np.rint(np.asarray(img_array) * 255.0).astype(np.uint8)
+    digest = hashlib.blake2b(pixels.tobytes(), digest_size=16)
+    digest.update(repr(pixels.shape).encode())
+    return _key('tensor', digest.hexdigest(), model_name)
+
+
+class _DiskStore:
+    """SQLite-backed store shared across processes on one host"""
+
+    def __init__(self, directory, max_entries):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, 'predictions.sqlite3')
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._puts = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL,"
+                " probabilities BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            # Lets prune find its cutoff without sorting the table
+            conn.execute("CREATE INDEX IF NOT EXISTS predictions_created ON predictions (created)")
+
+    def _connect(self):
+        # One connection per thread and per process (connections must not
+        # cross a fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, model):
+        row = self._connect().execute(
+            "SELECT probabilities FROM predictions WHERE key = ? AND model = ?",
+            (key, model)
+        ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def put(self, key, model, probabilities):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                (key, model, np.asarray(probabilities, dtype=np.float32).tobytes(), time.time())
+            )
+        self._puts += 1
+        if self._puts % 100 == 0:
+            self.prune()
+
+    def prune(self):
+        """Keep the newest ``max_entries`` entries"""
+        # The cutoff is one step down the created index, and only the rows
+        # past it are touched, so this stays cheap on the request path
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM predictions WHERE created <= ("
+                " SELECT created FROM predictions ORDER BY created DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def invalidate(self, model):
+        """Drop entries computed by any model other than ``model``"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM predictions WHERE model != ?", (model,))
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+
+class PredictionCache:
+    """LRU cache of probability vectors keyed by image content"""
+
+    def __init__(self, max_entries=4096, max_bytes=16 * 1024 * 1024,
+                 disk_dir=None, max_disk_entries=100_000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.model = None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk = _DiskStore(disk_dir, max_disk_entries) if disk_dir else None
+        self.hits = {'raw': 0, 'tensor': 0, 'disk': 0}
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def set_model(self, fingerprint):
+        """Switch to a newly loaded model, dropping entries from any other model"""
+        if fingerprint == self.model:
+            return
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.model = fingerprint
+        if self._disk is not None:
+            self._disk.invalidate(fingerprint)
+
+    def get(self, key):
+        """Look up a probability vector, or return None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            probabilities = self._entries.get(key)
+            if probabilities is not None:
+                self._entries.move_to_end(key)
+                self.hits[key.split(':', 1)[0]] += 1
+                return probabilities
+
+        if self._disk is not None:
+            probabilities = self._disk.get(key, self.model)
+            if probabilities is not None:
+                self.hits['disk'] += 1
+                self._store(key, probabilities)
+                return probabilities
+        return None
+
+    def contains(self, key):
+        """Whether ``key`` is in the in-memory cache (no stats, no disk lookup)"""
+        return self.enabled and key in self._entries
+
+    def record_miss(self):
+        self.misses += 1
+
+    def put(self, key, probabilities):
+        """Cache a probability vector in memory and, if configured, on disk"""
+        if not self.enabled:
+            return
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        self._store(key, probabilities)
+        if self._disk is not None:
+            self._disk.put(key, self.model, probabilities)
+
+    def _store(self, key, probabilities):
+        size = probabilities.nbytes + _ENTRY_OVERHEAD
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes + _ENTRY_OVERHEAD
+            self._entries[key] = probabilities
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes + _ENTRY_OVERHEAD
+                self.evictions += 1
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        hits = sum(self.hits.values())
+        lookups = hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': dict(self.hits),
+            'misses': self.misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'disk_entries': self._disk.count() if self._disk is not None else None
+        }
@@ -0,0 +1,224 @@
+"""
+Image decoding and preprocessing for model input.
+
+Uploads are decoded at reduced resolution where the format allows it (JPEG
+DCT scaling via ``Image.draft``), resized straight to the model input size
+and normalized into float32 without a float64 intermediate. Images whose
+header declares more than ``MAX_IMAGE_PIXELS`` pixels are rejected before
+any pixel data is decoded. Corrupt or truncated image data raises
+``UnsupportedImage``, like uploads that aren't images at all.
+"""
+import io
+import os
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+from timing import NULL_TIMER
+from uploads import UnsupportedImage
+
+# Reject decompression bombs before decoding (default: 50 MP, ~4x a 12 MP photo)
+MAX_IMAGE_PIXELS = int(os.environ.get('MAX_IMAGE_PIXELS', 50_000_000))
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+# open_image rejects everything above the limit itself; Pillow only warns
+# between 1x and 2x it
+warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+
+# JPEGs are DCT-scaled to at least this multiple of the target size so the
+# final resize still has real pixels to filter from
+DRAFT_OVERSAMPLE = 2
+
+_PIXEL_MAX = np.float32(255.0)
+
+
+class ImageTooLarge(ValueError):
+    """Raised when an image declares more pixels than MAX_IMAGE_PIXELS"""
+
+
+@contextmanager
+def _decoding():
+    # Pillow reports undecodable pixel data as OSError
+    try:
+        yield
+    except OSError as e:
+        raise UnsupportedImage(f"Image data is corrupt or truncated: {e}") from None
+
+
+def _open(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    return Image.open(source)
+
+
+def open_image(source):
+    """Open an image (bytes or file-like) and check its declared size; no pixels are decoded"""
+    try:
+        img = _open(source)
+    except Image.DecompressionBombError:
+        # Pillow refuses more than 2x MAX_IMAGE_PIXELS inside Image.open
+        raise ImageTooLarge(f"Image is larger than the {MAX_IMAGE_PIXELS} pixel limit") from None
+    except Image.UnidentifiedImageError:
+        # A valid signature followed by an unreadable header
+        raise UnsupportedImage("Image data is corrupt or not a supported format") from None
+    width, height = img.size
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ImageTooLarge(
+            f"Image is {width}x{height} pixels, larger than the {MAX_IMAGE_PIXELS} pixel limit"
+        )
+    return img
+
+
+def decode_image(source, size):
+    """Decode an image (bytes, file-like or from ``open_image``) to RGB, at no less than ``size``.
+
+    JPEGs are decoded at the smallest DCT scale that still covers
+    DRAFT_OVERSAMPLE times ``size``; other formats decode at full resolution.
+    All pixels are decoded here, so corrupt data raises UnsupportedImage.
+    """
+    img = source if isinstance(source, Image.Image) else open_image(source)
+
+    with _decoding():
+        if img.format == 'JPEG':
+            img.draft('RGB', (size[0] * DRAFT_OVERSAMPLE, size[1] * DRAFT_OVERSAMPLE))
+
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.load()
+    return img
+
+
+def resize_image(img, size, box=None):
+    # reducing_gap lets Pillow shrink large non-JPEG images with a cheap box
+    # reduction first; quality is indistinguishable at a 3x gap. ``box``
+    # crops in the same pass, without copying the region first
+    return img.resize(size, Image.BICUBIC, box=box, reducing_gap=3.0)
+
+
+def tile_boxes(grid, overlap):
+    """(left, top, right, bottom) crops of a ``grid`` x ``grid`` tiling, as fractions of the image.
+
+    Neighbouring crops overlap by ``overlap`` of a crop's width/height, and
+    together they cover the whole image. Row-major order.
+    """
+    extent = 1.0 / (grid - (grid - 1) * overlap)
+    step = extent * (1.0 - overlap)
+    return [
+        (col * step, row * step, min(col * step + extent, 1.0), min(row * step + extent, 1.0))
+        for row in range(grid) for col in range(grid)
+    ]
+
+
+def tiled_decode_size(size, grid, overlap):
+    """Decode size at which each crop of a tiling still covers ``size`` pixels"""
+    factor = grid - (grid - 1) * overlap
+    return (int(np.ceil(size[0] * factor)), int(np.ceil(size[1] * factor)))
+
+
+def load_image(source, size):
+    """Decode an image (bytes or file-like) to an RGB PIL image of ``size``"""
+    return resize_image(decode_image(source, size), size)
+
+
+def image_to_array(img, out):
+    """Write a resized RGB PIL image into the (H, W, 3) float32 array ``out``, in [0, 1]"""
+    np.divide(np.asarray(img), _PIXEL_MAX, out=out)
+    return out
+
+
+def preprocess_into(out, source, size):
+    """Decode ``source`` and write normalized pixels into the (H, W, 3) float32 array ``out``"""
+    return image_to_array(load_image(source, size), out)
+
+
+def new_batch_buffer(batch_size, size):
+    """Allocate a float32 (N, H, W, 3) batch buffer for ``preprocess_into``"""
+    return np.empty((batch_size, size[1], size[0], 3), dtype=np.float32)
+
+
+def preprocess_image(source, size):
+    """Preprocess one image into a (1, H, W, 3) float32 array in [0, 1]"""
+    batch = new_batch_buffer(1, size)
+    preprocess_into(batch[0], source, size)
+    return batch
+
+
+class DecodedImage:
+    """An upload decoded at most once, served as arrays at several input sizes.
+
+    Decoding is deferred until the first ``array()`` call so that callers
+    which never need pixels (e.g. on a cache hit) pay nothing. A size larger
+    than the ``sizes`` decoded for (a cascade's escalated stage) re-decodes
+    the source if the first decode was a reduced JPEG draft. Time spent is
+    recorded on ``timer`` as the 'decode' and 'preprocess' stages.
+    """
+
+    def __init__(self, source, sizes, timer=NULL_TIMER):
+        self.source = source
+        self.decode_size = max(sizes, key=lambda s: s[0] * s[1])
+        self.timer = timer
+        self.original_size = None
+        self._img = None
+        self._arrays = {}
+
+    def _covers(self, size):
+        # A full-resolution decode serves any size; a draft only up to the
+        # size it was scaled for
+        return self._img.size == self.original_size or (
+            size[0] <= self.decode_size[0] and size[1] <= self.decode_size[1]
+        )
+
+    def _decode(self, size=None):
+        if self._img is not None and (size is None or self._covers(size)):
+            return self._img
+        if self._img is not None:
+            self.decode_size = (max(size[0], self.decode_size[0]), max(size[1], self.decode_size[1]))
+            self.source.seek(0)
+        with self.timer.stage('decode'):
+            img = open_image(self.source)
+            self.original_size = img.size
+            self._img = decode_image(img, self.decode_size)
+        return self._img
+
+    def array(self, size):
+        """(1, H, W, 3) float32 array for ``size``"""
+        size = tuple(size)
+        if size not in self._arrays:
+            img = self._decode(size)
+            with self.timer.stage('preprocess'):
+                batch = new_batch_buffer(1, size)
+                image_to_array(resize_image(img, size), batch[0])
+            self._arrays[size] = batch
+        return self._arrays[size]
+
+    def tiles(self, size, grid, overlap):
+        """(1 + grid², H, W, 3) batch: the full view, then the ``tile_boxes`` crops.
+
+        Construct with ``tiled_decode_size`` among the sizes so that crops are
+        cut from enough pixels.
+        """
+        key = ('tiles', tuple(size), grid, overlap)
+        if key not in self._arrays:
+            img = self._decode()
+            width, height = img.size
+            boxes = tile_boxes(grid, overlap)
+            with self.timer.stage('preprocess'):
+                batch = new_batch_buffer(1 + len(boxes), size)
+                image_to_array(resize_image(img, size), batch[0])
+                for out, (left, top, right, bottom) in zip(batch[1:], boxes):
+                    box = (left * width, top * height, right * width, bottom * height)
+                    image_to_array(resize_image(img, size, box), out)
+            self._arrays[key] = batch
+        return self._arrays[key]
+
+
+def legacy_preprocess_image(image_bytes, size):
+    """Original full-decode float64 path, kept as the benchmark baseline"""
+    img = Image.open(io.BytesIO(image_bytes))
+    img = img.convert('RGB')
+    img = img.resize(size)
+    img_array = np.array(img)
+    img_array = np.expand_dims(img_array, axis=0)
+    img_array = img_array / 255.0
+    return img_array
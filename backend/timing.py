@@ -0,0 +1,39 @@
+"""
+Per-request stage timing.
+
+A ``StageTimer`` accumulates wall-clock time per named stage (read, decode,
+preprocess, inference, postprocess, json) of one request and renders it as
+a ``Server-Timing`` header, which load tests and browser dev tools read;
+metrics.py feeds the same stages into the /metrics histograms.
+"""
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class StageTimer:
+    """Seconds spent in each named stage of one request"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def server_timing(self):
+        """``Server-Timing`` header value (durations in milliseconds)"""
+        return ', '.join(f'{name};dur={seconds * 1000.0:.2f}' for name, seconds in self.stages.items())
+
+
+class _NullTimer:
+    """Stand-in for callers that don't time their stages"""
+
+    def stage(self, name):
+        return nullcontext()
+
+
+NULL_TIMER = _NullTimer()
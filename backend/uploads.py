@@ -0,0 +1,117 @@
+"""
+Upload ingestion: size limits, image type sniffing and in-place reading.
+
+Uploads are never pulled into one bytes object. The web framework spools
+each file (to disk beyond a small threshold); its first bytes are matched
+against known image signatures, so other payloads are rejected without
+being decoded; the prediction cache digest is hashed in chunks; and PIL
+decodes straight from the spooled stream.
+"""
+import io
+import os
+import tempfile
+
+from prediction_cache import stream_digest
+
+# Whole-request limits; larger requests get 413 before their body is read
+MAX_UPLOAD_MB = float(os.environ.get('MAX_UPLOAD_MB', 32))
+MAX_UPLOAD_BYTES = int(MAX_UPLOAD_MB * 1024 * 1024)
+# /api/predict/batch takes archives of many images
+MAX_BATCH_UPLOAD_MB = float(os.environ.get('MAX_BATCH_UPLOAD_MB', 512))
+MAX_BATCH_UPLOAD_BYTES = int(MAX_BATCH_UPLOAD_MB * 1024 * 1024)
+# Files per multipart batch (an archive counts as one), plus a few form fields
+MAX_BATCH_FILES = int(os.environ.get('MAX_BATCH_FILES', 10000))
+MAX_BATCH_FIELDS = 16
+
+# (offset, magic bytes, format) of the image types the models accept
+IMAGE_SIGNATURES = [
+    (0, b'\xff\xd8\xff', 'JPEG'),
+    (0, b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (8, b'WEBP', 'WEBP'),
+    (0, b'GIF87a', 'GIF'),
+    (0, b'GIF89a', 'GIF'),
+    (0, b'BM', 'BMP'),
+    (0, b'II*\x00', 'TIFF'),
+    (0, b'MM\x00*', 'TIFF')
+]
+_HEADER_BYTES = 16
+_UNSUPPORTED = 'Unsupported file type: upload a JPEG, PNG, WebP, GIF, BMP or TIFF image'
+
+# Archive members are spooled to disk beyond this size
+SPOOL_MAX_BYTES = 1024 * 1024
+_COPY_CHUNK = 256 * 1024
+
+
+class UnsupportedImage(ValueError):
+    """Raised for uploads that don't start with a supported image signature"""
+
+
+class UploadTooLarge(ValueError):
+    """Raised for uploads (or archive members) over MAX_UPLOAD_MB"""
+
+
+def sniff_format(header):
+    """Image format named by the leading bytes of a file, or None"""
+    for offset, magic, fmt in IMAGE_SIGNATURES:
+        if header[offset:offset + len(magic)] == magic:
+            if fmt == 'WEBP' and not header.startswith(b'RIFF'):
+                continue
+            return fmt
+    return None
+
+
+def check_image(stream):
+    """Format of an image upload from its first bytes; raises UnsupportedImage.
+
+    The stream is left at the start.
+    """
+    stream.seek(0)
+    header = stream.read(_HEADER_BYTES)
+    stream.seek(0)
+    fmt = sniff_format(header)
+    if fmt is None:
+        raise UnsupportedImage(_UNSUPPORTED)
+    return fmt
+
+
+def spool_member(stream, size):
+    """Copy a ``size``-byte archive member into a rewound spooled temporary file.
+
+    The declared size and the image signature are checked before the rest of
+    the member is read (UploadTooLarge, UnsupportedImage), and the copy stops
+    at MAX_UPLOAD_BYTES whatever the archive header claimed.
+    """
+    if size > MAX_UPLOAD_BYTES:
+        raise UploadTooLarge(f'File is {size / (1024 * 1024):.1f} MB, larger than the {MAX_UPLOAD_MB:g} MB limit')
+    header = stream.read(_HEADER_BYTES)
+    if sniff_format(header) is None:
+        raise UnsupportedImage(_UNSUPPORTED)
+
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    spool.write(header)
+    copied = len(header)
+    while chunk := stream.read(_COPY_CHUNK):
+        copied += len(chunk)
+        if copied > MAX_UPLOAD_BYTES:
+            spool.close()
+            raise UploadTooLarge(f'File is larger than the {MAX_UPLOAD_MB:g} MB limit')
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+class Upload:
+    """An image upload read in place from its stream (or from bytes).
+
+    On construction the format is checked and the contents are hashed for
+    the prediction cache; ``stream`` is then rewound for the decoder.
+    """
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        self.stream = source
+        self.format = check_image(source)
+        self.digest = stream_digest(source)
+        self.size = source.seek(0, io.SEEK_END)
+        source.seek(0)